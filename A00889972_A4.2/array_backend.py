@@ -0,0 +1,156 @@
+"""
+
+Optional NumPy backend for the A4.2 number scripts.
+
+This module reads a file of numbers into a float64 array, using the
+same fast_reader tokenizer as the pure-Python path, and provides
+vectorized kernels for the descriptive statistics. Every kernel
+returns plain Python numbers, with integral values as int, so the
+results print exactly like the pure-Python functions.
+
+When NumPy is not installed HAS_NUMPY is False and callers are
+expected to use their pure-Python path instead.
+
+Author: Najk
+Date: 01-02-2024.
+"""
+
+import fast_reader
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+HAS_NUMPY = np is not None
+
+
+def as_number(value):
+    """
+    Convert an array element to the number type used by the scripts.
+
+    Args:
+        value (float): The value to convert.
+
+    Returns:
+        int or float: An int when the value is integral, else a float.
+    """
+    value = float(value)
+    if value.is_integer():
+        return int(value)
+    return value
+
+
+def load_array(file_name, report=None):
+    """
+    Read numbers from a file into a float64 array.
+
+    The file is tokenized by fast_reader, like the pure-Python path,
+    and each chunk of numbers is converted to an array as it is read.
+
+    Args:
+        file_name (str): The name of the file to read.
+        report (InvalidTokens): Collects the invalid tokens; without
+        one, a summary is printed once the file is read.
+
+    Returns:
+        numpy.ndarray: The numbers read from the file.
+    """
+    chunks = [np.array(chunk, dtype=np.float64)
+              for chunk in fast_reader.iter_number_chunks(
+                  file_name, report, as_float=True)]
+    if not chunks:
+        return np.empty(0, dtype=np.float64)
+    return np.concatenate(chunks)
+
+
+def to_numbers(array):
+    """
+    Convert an array to a list of ints and floats.
+
+    Args:
+        array (numpy.ndarray): The numbers to convert.
+
+    Returns:
+        list: The numbers, with integral values as int.
+    """
+    return [as_number(value) for value in array.tolist()]
+
+
+def array_sum(array):
+    """
+    Sum an array exactly like the builtin sum() of its numbers.
+
+    Integral values are summed as exact integers up to the first
+    fractional value; the rest is handed to the builtin sum(), so the
+    result matches on every Python version, including the compensated
+    float sum of 3.12 and later.
+
+    Args:
+        array (numpy.ndarray): The numbers to sum.
+
+    Returns:
+        int or float: The sum.
+    """
+    fractional = np.flatnonzero(
+        ~np.isfinite(array) | (array != np.floor(array)))
+    split = int(fractional[0]) if fractional.size else array.size
+    head = array[:split]
+    if head.size and np.abs(head).max() * head.size < 2 ** 62:
+        total = int(head.astype(np.int64).sum())
+    else:
+        total = sum(int(value) for value in head.tolist())
+    if split == array.size:
+        return total
+    return sum(to_numbers(array[split:]), total)
+
+
+def array_mean(array):
+    """Return the mean of an array, or None if it is empty."""
+    return array_sum(array) / array.size if array.size else None
+
+
+def array_variance(array, mean):
+    """
+    Return the population variance of an array, or None if empty.
+
+    Args:
+        array (numpy.ndarray): The numbers.
+        mean (float): The mean of the numbers.
+    """
+    if not array.size:
+        return None
+    return sum(((array - mean) ** 2).tolist()) / array.size
+
+
+def array_select(array, ranks):
+    """
+    Find several order statistics of an array with one partition.
+
+    Args:
+        array (numpy.ndarray): The numbers.
+        ranks (iterable): Zero-based ranks to find.
+
+    Returns:
+        dict: The value at each requested rank of the sorted array.
+    """
+    wanted = sorted(set(ranks))
+    if not wanted:
+        return {}
+    partitioned = np.partition(array, wanted)
+    return {rank: as_number(partitioned[rank]) for rank in wanted}
+
+
+def array_mode(array):
+    """
+    Return the most frequent value of an array, or None if empty.
+
+    Ties are broken by first appearance in the array.
+    """
+    if not array.size:
+        return None
+    values, first_index, counts = np.unique(
+        array, return_index=True, return_counts=True)
+    candidates = np.flatnonzero(counts == counts.max())
+    winner = candidates[np.argmin(first_index[candidates])]
+    return as_number(values[winner])
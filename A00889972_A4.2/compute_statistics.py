@@ -9,14 +9,50 @@ such as mean, median, mode, variance, and
 standard deviation, and saves the results
 in a text file named StatisticsResults.txt.
 
-Usage: python compute_statistics.py fileWithData.txt
+Usage: python compute_statistics.py fileWithData.txt [--no-median]
+                                    [--no-mode]
+       python compute_statistics.py directoryOrGlob [--workers N]
+       python compute_statistics.py fileOrDirectory --incremental
+       python compute_statistics.py fileWithData.txt --window N [--step S]
 
 Author: Najk
 Date: 01-02-2024.
 """
 
-import sys
+import argparse
+import glob
+import hashlib
+import json
+import os
 import time
+from concurrent.futures import ProcessPoolExecutor
+
+import array_backend
+import fast_reader
+from rolling_stats import RollingStatistics
+from sketches import SpaceSaving, TDigest
+
+RESULTS_FILE = "StatisticsResults.txt"
+SUMMARY_FILE = "StatisticsSummary.json"
+MODE_CAPACITY = 4096
+
+
+def iter_numbers(file_name):
+    """
+    Yield numbers from a file as a stream.
+
+    The file is memory-mapped and parsed a block at a time; invalid
+    tokens are skipped and reported once at the end.
+
+    Args:
+        file_name (str): The name of the file to read.
+
+    Yields:
+        int or float: Each valid number in the file, as an int when
+        the value is integral.
+    """
+    for chunk in fast_reader.iter_number_chunks(file_name):
+        yield from chunk
 
 
 def read_file(file_name):
@@ -29,21 +65,7 @@ def read_file(file_name):
     Returns:
         list: A list of numbers read from the file.
     """
-    numbers = []
-    try:
-        with open(file_name, 'r', encoding='utf-8') as file:
-            for line in file:
-                try:
-                    number = float(line.strip())
-                    if number.is_integer():
-                        numbers.append(int(number))
-                    else:
-                        numbers.append(number)
-                except ValueError:
-                    print(f"Invalid data: '{line.strip()}'")
-    except FileNotFoundError:
-        print("File not found.")
-    return numbers
+    return list(iter_numbers(file_name))
 
 
 def compute_mean(numbers):
@@ -59,21 +81,171 @@ def compute_mean(numbers):
     return sum(numbers) / len(numbers) if numbers else None
 
 
-def compute_median(numbers):
+def select_ranks(buffer, ranks):
+    """
+    Find several order statistics of a list with one partitioning pass.
+
+    The list is partially reordered in place (introselect): each step
+    partitions a range around a median-of-three pivot by swapping
+    elements within it, and only keeps the sub-ranges that still
+    contain a requested rank, falling back to a sort when the recursion
+    gets too deep, so the list is the only sizeable memory used.
+
+    Args:
+        buffer (list): The numbers; reordered in place.
+        ranks (iterable): Zero-based ranks to find.
+
+    Returns:
+        dict: The value at each requested rank of the sorted list.
+    """
+    wanted = sorted(set(ranks))
+    depth_limit = 2 * max(len(buffer), 1).bit_length()
+    pending = [(0, len(buffer), wanted, 0)] if wanted else []
+    while pending:
+        low, high, targets, depth = pending.pop()
+        if high - low <= 16 or depth > depth_limit:
+            buffer[low:high] = sorted(buffer[low:high])
+            continue
+        middle = (low + high) // 2
+        first, pivot, last = sorted((buffer[low], buffer[middle],
+                                     buffer[high - 1]))
+        buffer[low], buffer[middle], buffer[high - 1] = first, pivot, last
+        # Hoare partition: the sorted ends stop both scans in range.
+        i, j = low, high - 1
+        while True:
+            i += 1
+            while buffer[i] < pivot:
+                i += 1
+            j -= 1
+            while buffer[j] > pivot:
+                j -= 1
+            if i >= j:
+                break
+            buffer[i], buffer[j] = buffer[j], buffer[i]
+        split = j + 1
+        left = [rank for rank in targets if rank < split]
+        right = [rank for rank in targets if rank >= split]
+        if left:
+            pending.append((low, split, left, depth + 1))
+        if right:
+            pending.append((split, high, right, depth + 1))
+    return {rank: buffer[rank] for rank in wanted}
+
+
+def select_ranks_from_frequency(frequency, ranks):
+    """
+    Find several order statistics from a frequency table.
+
+    Args:
+        frequency (dict): A dictionary mapping each number to its count.
+        ranks (iterable): Zero-based ranks to find.
+
+    Returns:
+        dict: The value at each requested rank of the sorted numbers.
+    """
+    wanted = sorted(set(ranks))
+    values = {}
+    position = 0
+    cumulative = 0
+    for number in sorted(frequency):
+        cumulative += frequency[number]
+        while position < len(wanted) and wanted[position] < cumulative:
+            values[wanted[position]] = number
+            position += 1
+        if position == len(wanted):
+            break
+    return values
+
+
+def _median_ranks(count):
+    """Return the ranks whose values make up the median."""
+    if count % 2 == 0:
+        return (count // 2 - 1, count // 2)
+    return (count // 2,)
+
+
+def _median_from_ranks(values, count):
+    """Combine the selected middle values into the median."""
+    if count % 2 == 0:
+        return (values[count // 2 - 1] + values[count // 2]) / 2
+    return values[count // 2]
+
+
+def _quantile_position(percentile, count):
+    """
+    Return the interpolation position of a percentile.
+
+    Raises:
+        ValueError: If the percentile is outside [0, 100].
+    """
+    if not 0 <= percentile <= 100:
+        raise ValueError(f"Percentile out of range: {percentile}")
+    position = (count - 1) * percentile / 100
+    lower = int(position)
+    return lower, position - lower
+
+
+def _quantile_ranks(percentiles, count):
+    """Return every rank needed to interpolate the given percentiles."""
+    ranks = []
+    for percentile in percentiles:
+        lower, fraction = _quantile_position(percentile, count)
+        ranks.append(lower)
+        if fraction:
+            ranks.append(lower + 1)
+    return ranks
+
+
+def _quantile_from_ranks(values, percentile, count):
+    """Linearly interpolate a percentile from the selected values."""
+    lower, fraction = _quantile_position(percentile, count)
+    if not fraction:
+        return values[lower]
+    return values[lower] + (values[lower + 1] - values[lower]) * fraction
+
+
+def compute_median(numbers, in_place=False):
     """
     Compute the median of a list of numbers.
 
     Args:
         numbers (list): A list of numbers.
+        in_place (bool): Reorder ``numbers`` instead of copying it.
 
     Returns:
         float: The median of the numbers.
     """
-    sorted_numbers = sorted(numbers)
-    number = len(sorted_numbers)
-    if number % 2 == 0:
-        return (sorted_numbers[number // 2-1] + sorted_numbers[number//2])/2
-    return sorted_numbers[number // 2]
+    if not numbers:
+        return None
+    buffer = numbers if in_place else list(numbers)
+    count = len(buffer)
+    values = select_ranks(buffer, _median_ranks(count))
+    return _median_from_ranks(values, count)
+
+
+def compute_quantiles(numbers, percentiles, in_place=False):
+    """
+    Compute several percentiles of a list of numbers together.
+
+    Percentiles are linearly interpolated between the closest ranks,
+    and all of them are selected over a single partitioned buffer.
+
+    Args:
+        numbers (list): A list of numbers.
+        percentiles (iterable): Percentiles to compute, from 0 to 100.
+        in_place (bool): Reorder ``numbers`` instead of copying it.
+
+    Returns:
+        dict: The value of each percentile, or None for an empty list.
+    """
+    percentiles = list(percentiles)
+    if not numbers:
+        return {percentile: None for percentile in percentiles}
+    buffer = numbers if in_place else list(numbers)
+    count = len(buffer)
+    values = select_ranks(buffer, _quantile_ranks(percentiles, count))
+    return {percentile: _quantile_from_ranks(values, percentile, count)
+            for percentile in percentiles}
 
 
 def compute_mode(numbers):
@@ -91,6 +263,22 @@ def compute_mode(numbers):
     frequency = {}
     for number in numbers:
         frequency[number] = frequency.get(number, 0) + 1
+    return mode_from_frequency(frequency)
+
+
+def mode_from_frequency(frequency):
+    """
+    Compute the mode from a frequency table.
+
+    Args:
+        frequency (dict): A dictionary mapping each number to its count,
+        in order of first appearance.
+
+    Returns:
+        The mode of the numbers, or None if the table is empty.
+    """
+    if not frequency:
+        return None
     max_frequency = max(frequency.values())
     mode = [k for k, v in frequency.items() if v == max_frequency]
     if len(mode) == 1:
@@ -129,63 +317,795 @@ def compute_variance(numbers, mean):
         (x-mean)**2 for x in numbers) / len(numbers) if numbers else None
 
 
-def process_file(file_path):
+class StreamingStatistics:
+    """
+    Accumulate descriptive statistics in a single pass.
+
+    Count, mean, variance and standard deviation are updated with
+    Welford's method in constant memory. Median and mode need to keep
+    the values (or their frequencies) around, so they are only tracked
+    when requested.
+    """
+
+    def __init__(self, track_median=False, track_mode=False):
+        """
+        Initialize an empty accumulator.
+
+        Args:
+            track_median (bool): Keep the values to compute the median.
+            track_mode (bool): Keep a frequency table to compute the mode.
+        """
+        self.count = 0
+        self.total = 0
+        self._running_mean = 0.0
+        self._m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+        self._values = [] if track_median else None
+        self._frequency = {} if track_mode else None
+
+    def update(self, number):
+        """
+        Add a number to the accumulator.
+
+        Args:
+            number (float): The number to add.
+        """
+        self.count += 1
+        self.total += number
+        delta = number - self._running_mean
+        self._running_mean += delta / self.count
+        self._m2 += delta * (number - self._running_mean)
+        if self.minimum is None or number < self.minimum:
+            self.minimum = number
+        if self.maximum is None or number > self.maximum:
+            self.maximum = number
+        if self._values is not None:
+            self._values.append(number)
+        if self._frequency is not None:
+            self._frequency[number] = self._frequency.get(number, 0) + 1
+
+    def consume(self, numbers):
+        """
+        Add every number of an iterable to the accumulator.
+
+        Args:
+            numbers (iterable): The numbers to add.
+
+        Returns:
+            StreamingStatistics: The accumulator itself.
+        """
+        for number in numbers:
+            self.update(number)
+        return self
+
+    def merge(self, other):
+        """
+        Merge another accumulator into this one.
+
+        Moments are combined with Chan's parallel update; count, sum,
+        minimum, maximum, values and frequencies are combined exactly.
+        Values and frequencies are only kept if both sides track them.
+
+        Args:
+            other (StreamingStatistics): The accumulator to merge.
+
+        Returns:
+            StreamingStatistics: The accumulator itself.
+        """
+        if not other.count:
+            return self
+        count = self.count + other.count
+        delta = other._running_mean - self._running_mean
+        self._m2 += (other._m2
+                     + delta * delta * self.count * other.count / count)
+        self._running_mean += delta * other.count / count
+        self.count = count
+        self.total += other.total
+        if self.minimum is None or other.minimum < self.minimum:
+            self.minimum = other.minimum
+        if self.maximum is None or other.maximum > self.maximum:
+            self.maximum = other.maximum
+        if self._values is not None and other._values is not None:
+            self._values.extend(other._values)
+        else:
+            self._values = None
+        if self._frequency is not None and other._frequency is not None:
+            for number, frequency in other._frequency.items():
+                self._frequency[number] = (
+                    self._frequency.get(number, 0) + frequency)
+        else:
+            self._frequency = None
+        return self
+
+    def to_dict(self):
+        """
+        Return the exact moments as a JSON-serializable dictionary.
+
+        Tracked values and frequencies are not included.
+        """
+        return {"count": self.count,
+                "total": self.total,
+                "mean": self._running_mean,
+                "m2": self._m2,
+                "minimum": self.minimum,
+                "maximum": self.maximum}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create an accumulator from a dictionary made by to_dict."""
+        stats = cls()
+        stats.count = data["count"]
+        stats.total = data["total"]
+        stats._running_mean = data["mean"]
+        stats._m2 = data["m2"]
+        stats.minimum = data["minimum"]
+        stats.maximum = data["maximum"]
+        return stats
+
+    def mean(self):
+        """Return the mean, or None if no numbers were added."""
+        return self.total / self.count if self.count else None
+
+    def variance(self):
+        """Return the population variance, or None if empty."""
+        return self._m2 / self.count if self.count else None
+
+    def standard_deviation(self):
+        """Return the population standard deviation, or None if empty."""
+        variance = self.variance()
+        return variance ** 0.5 if variance else None
+
+    def median(self):
+        """
+        Return the median.
+
+        Raises:
+            ValueError: If the accumulator does not track the median.
+        """
+        return self.order_statistics(())[0]
+
+    def quantiles(self, percentiles):
+        """
+        Return the given percentiles.
+
+        Raises:
+            ValueError: If the accumulator does not track the values.
+        """
+        return self.order_statistics(percentiles)[1]
+
+    def order_statistics(self, percentiles):
+        """
+        Return the median and the given percentiles from one selection.
+
+        The tracked values are reordered in place, so no copy is made.
+        Without tracked values the frequency table is used instead,
+        which gives the same exact result.
+
+        Args:
+            percentiles (iterable): Percentiles to compute, from 0 to 100.
+
+        Returns:
+            tuple: The median and a dict with the value of each
+            percentile.
+
+        Raises:
+            ValueError: If the accumulator does not track the values.
+        """
+        if self._values is None and self._frequency is None:
+            raise ValueError("Median is not being tracked.")
+        percentiles = list(percentiles)
+        if not self.count:
+            return None, {percentile: None for percentile in percentiles}
+        count = self.count
+        ranks = (list(_median_ranks(count))
+                 + _quantile_ranks(percentiles, count))
+        if self._values is not None:
+            values = select_ranks(self._values, ranks)
+        else:
+            values = select_ranks_from_frequency(self._frequency, ranks)
+        return (_median_from_ranks(values, count),
+                {percentile: _quantile_from_ranks(values, percentile, count)
+                 for percentile in percentiles})
+
+    def mode(self):
+        """
+        Return the mode.
+
+        Raises:
+            ValueError: If the accumulator does not track the mode.
+        """
+        if self._frequency is None:
+            raise ValueError("Mode is not being tracked.")
+        return mode_from_frequency(self._frequency)
+
+
+class ArrayStatistics:
+    """
+    Descriptive statistics over a NumPy array.
+
+    Offers the same interface as StreamingStatistics, but loads the
+    whole file into a float64 array and computes each statistic with a
+    vectorized kernel. The results match compute_mean, compute_median,
+    compute_mode and compute_variance exactly.
+    """
+
+    def __init__(self, array):
+        """
+        Initialize the statistics for an array.
+
+        Args:
+            array (numpy.ndarray): The numbers.
+        """
+        self.array = array
+        self.count = int(array.size)
+        self._mean = array_backend.array_mean(array)
+
+    @classmethod
+    def from_file(cls, file_name):
+        """Bulk-load a file into a new ArrayStatistics."""
+        return cls(array_backend.load_array(file_name))
+
+    def mean(self):
+        """Return the mean, or None if the array is empty."""
+        return self._mean
+
+    def variance(self):
+        """Return the population variance, or None if empty."""
+        return array_backend.array_variance(self.array, self._mean)
+
+    def standard_deviation(self):
+        """Return the population standard deviation, or None if empty."""
+        variance = self.variance()
+        return variance ** 0.5 if variance else None
+
+    def median(self):
+        """Return the median."""
+        return self.order_statistics(())[0]
+
+    def quantiles(self, percentiles):
+        """Return the given percentiles."""
+        return self.order_statistics(percentiles)[1]
+
+    def order_statistics(self, percentiles):
+        """
+        Return the median and the given percentiles from one partition.
+
+        Args:
+            percentiles (iterable): Percentiles to compute, from 0 to 100.
+
+        Returns:
+            tuple: The median and a dict with the value of each
+            percentile.
+        """
+        percentiles = list(percentiles)
+        if not self.count:
+            return None, {percentile: None for percentile in percentiles}
+        ranks = (list(_median_ranks(self.count))
+                 + _quantile_ranks(percentiles, self.count))
+        values = array_backend.array_select(self.array, ranks)
+        return (_median_from_ranks(values, self.count),
+                {percentile: _quantile_from_ranks(values, percentile,
+                                                  self.count)
+                 for percentile in percentiles})
+
+    def mode(self):
+        """Return the mode."""
+        return array_backend.array_mode(self.array)
+
+
+class SketchStatistics:
+    """
+    Descriptive statistics in bounded memory that can be persisted.
+
+    Count, mean, variance and standard deviation are exact. The median
+    and percentiles are estimated with a t-digest. The mode comes from
+    a Space-Saving heavy-hitter table, which is exact as long as at
+    most MODE_CAPACITY distinct values are seen.
+    """
+
+    def __init__(self, moments=None, digest=None, heavy_hitters=None):
+        """
+        Initialize the statistics, empty by default.
+
+        Args:
+            moments (StreamingStatistics): The exact moments.
+            digest (TDigest): The quantile sketch.
+            heavy_hitters (SpaceSaving): The frequency sketch.
+        """
+        self.moments = moments or StreamingStatistics()
+        self.digest = digest or TDigest()
+        self.heavy_hitters = heavy_hitters or SpaceSaving(MODE_CAPACITY)
+
+    @property
+    def count(self):
+        """Return the number of values added."""
+        return self.moments.count
+
+    def update(self, number):
+        """Add a number to every summary."""
+        self.moments.update(number)
+        self.digest.update(number)
+        self.heavy_hitters.update(number)
+
+    def consume(self, numbers):
+        """
+        Add every number of an iterable.
+
+        Returns:
+            SketchStatistics: The statistics themselves.
+        """
+        for number in numbers:
+            self.update(number)
+        return self
+
+    def merge(self, other):
+        """
+        Merge other sketch statistics into these.
+
+        Returns:
+            SketchStatistics: The statistics themselves.
+        """
+        self.moments.merge(other.moments)
+        self.digest.merge(other.digest)
+        self.heavy_hitters.merge(other.heavy_hitters)
+        return self
+
+    def mean(self):
+        """Return the mean, or None if empty."""
+        return self.moments.mean()
+
+    def variance(self):
+        """Return the population variance, or None if empty."""
+        return self.moments.variance()
+
+    def standard_deviation(self):
+        """Return the population standard deviation, or None if empty."""
+        return self.moments.standard_deviation()
+
+    def median(self):
+        """Return the estimated median."""
+        return self.digest.quantile(0.5)
+
+    def order_statistics(self, percentiles):
+        """
+        Return the estimated median and percentiles.
+
+        Args:
+            percentiles (iterable): Percentiles to estimate, from 0 to 100.
+
+        Returns:
+            tuple: The median and a dict with the value of each
+            percentile.
+        """
+        return (self.digest.quantile(0.5),
+                {percentile: self.digest.quantile(percentile / 100)
+                 for percentile in percentiles})
+
+    def mode(self):
+        """Return the most frequent value seen, or None if empty."""
+        most_common = self.heavy_hitters.most_common(1)
+        return most_common[0][0] if most_common else None
+
+    def to_dict(self):
+        """Return the statistics as a JSON-serializable dictionary."""
+        return {"moments": self.moments.to_dict(),
+                "digest": self.digest.to_dict(),
+                "heavy_hitters": self.heavy_hitters.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create statistics from a dictionary made by to_dict."""
+        return cls(StreamingStatistics.from_dict(data["moments"]),
+                   TDigest.from_dict(data["digest"]),
+                   SpaceSaving.from_dict(data["heavy_hitters"]))
+
+
+def load_statistics(file_path, with_median=True, with_mode=True,
+                    backend="auto"):
+    """
+    Read a file into a statistics object.
+
+    Args:
+        file_path (str): The path to the file to process.
+        with_median (bool): Track the values for median and percentiles.
+        with_mode (bool): Track the frequencies for the mode.
+        backend (str): "numpy", "python", or "auto" to use NumPy when it
+        is installed and the median or the mode is wanted; otherwise
+        the file is streamed in constant memory.
+
+    Returns:
+        ArrayStatistics or StreamingStatistics: The loaded statistics.
+
+    Raises:
+        ValueError: If the backend is unknown or NumPy is requested but
+        not installed.
+    """
+    if backend == "auto":
+        use_array = array_backend.HAS_NUMPY and (with_median or with_mode)
+        backend = "numpy" if use_array else "python"
+    if backend == "numpy":
+        if not array_backend.HAS_NUMPY:
+            raise ValueError("The numpy backend requires NumPy.")
+        return ArrayStatistics.from_file(file_path)
+    if backend != "python":
+        raise ValueError(f"Unknown backend: {backend}")
+    stats = StreamingStatistics(track_median=with_median,
+                                track_mode=with_mode)
+    return stats.consume(iter_numbers(file_path))
+
+
+def format_report(stats, with_median=True, with_mode=True,
+                  percentiles=(90, 99)):
+    """
+    Format descriptive statistics as report lines.
+
+    Args:
+        stats (StreamingStatistics or ArrayStatistics): The statistics.
+        with_median (bool): Include the median and percentiles.
+        with_mode (bool): Include the mode.
+        percentiles (iterable): Tail percentiles to report along with
+        the median.
+
+    Returns:
+        list: The lines of the report.
+    """
+    lines = ["Descriptive Statistics:",
+             f"Count: {stats.count}",
+             f"Mean: {stats.mean()}"]
+    if with_median:
+        median, quantiles = stats.order_statistics(percentiles)
+        lines.append(f"Median: {median}")
+        for percentile, value in quantiles.items():
+            lines.append(f"P{percentile}: {value}")
+    if with_mode:
+        lines.append(f"Mode: {stats.mode()}")
+    lines.append(f"Variance: {stats.variance()}")
+    lines.append(f"Standard Deviation: {stats.standard_deviation()}")
+    return lines
+
+
+def write_report(lines):
+    """
+    Print report lines and save them to the results file.
+
+    Args:
+        lines (list): The lines of the report.
+    """
+    for line in lines:
+        print(line)
+
+    with open(RESULTS_FILE, 'w', encoding='utf-8') as result_file:
+        for line in lines:
+            result_file.write(line + "\n")
+
+
+def process_file(file_path, with_median=True, with_mode=True,
+                 percentiles=(90, 99), backend="auto"):
     """
     Process a file to compute descriptive statistics.
 
+    The file is read once as a stream; median, percentiles and mode are
+    optional because they are the only statistics whose memory grows
+    with the input.
+
+    Args:
+        file_path (str): The path to the file to process.
+        with_median (bool): Include the median and percentiles in the
+        report.
+        with_mode (bool): Include the mode in the report.
+        percentiles (iterable): Tail percentiles to report along with
+        the median.
+        backend (str): "numpy", "python", or "auto" to use NumPy only
+        when it is installed and the median or the mode is wanted.
+    """
+    stats = load_statistics(file_path, with_median, with_mode, backend)
+    write_report(format_report(stats, with_median, with_mode, percentiles))
+
+
+def find_files(path):
+    """
+    Resolve a directory or glob pattern into a sorted list of files.
+
+    Args:
+        path (str): A directory, whose .txt files are used, or a glob
+        pattern. The results file itself is always skipped.
+
+    Returns:
+        list: The matching file paths.
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, "*.txt")
+    return sorted(file for file in glob.glob(path)
+                  if os.path.isfile(file)
+                  and os.path.basename(file) != RESULTS_FILE)
+
+
+def summarize_file(file_path, track_frequency=True):
+    """
+    Compute the partial aggregate of a single file.
+
+    The aggregate keeps count, sum, moments, minimum, maximum and
+    optionally a frequency table, so it is small to send back from a
+    worker process and can be merged exactly with other files.
+
+    Args:
+        file_path (str): The path to the file to summarize.
+        track_frequency (bool): Keep the frequency table, which the
+        median, percentiles and mode are computed from.
+
+    Returns:
+        StreamingStatistics: The aggregate of the file.
+    """
+    return StreamingStatistics(track_mode=track_frequency).consume(
+        iter_numbers(file_path))
+
+
+def process_directory(path, workers=None, percentiles=(90, 99),
+                      with_median=True, with_mode=True):
+    """
+    Process every file of a directory or glob pattern in parallel.
+
+    Each file is summarized by a worker process; the partial aggregates
+    are reported per file and merged into a global result.
+
+    Args:
+        path (str): A directory or glob pattern.
+        workers (int): Number of worker processes; all cores by default.
+        percentiles (iterable): Tail percentiles to report.
+        with_median (bool): Include the median and percentiles.
+        with_mode (bool): Include the mode.
+    """
+    files = find_files(path)
+    if not files:
+        print("No files found.")
+        return
+
+    track_frequency = with_median or with_mode
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        aggregates = list(executor.map(
+            summarize_file, files, [track_frequency] * len(files)))
+
+    lines = []
+    total = StreamingStatistics(track_mode=track_frequency)
+    for file_path, aggregate in zip(files, aggregates):
+        lines.append(f"File: {file_path}")
+        lines.extend(format_report(aggregate, with_median, with_mode,
+                                   percentiles))
+        lines.append(f"Min: {aggregate.minimum}")
+        lines.append(f"Max: {aggregate.maximum}")
+        lines.append("")
+        total.merge(aggregate)
+
+    lines.append(f"Global ({len(files)} files)")
+    lines.extend(format_report(total, with_median, with_mode,
+                               percentiles))
+    lines.append(f"Min: {total.minimum}")
+    lines.append(f"Max: {total.maximum}")
+    write_report(lines)
+
+
+def load_summary(summary_path):
+    """
+    Load a saved summary, or return an empty one.
+
+    Args:
+        summary_path (str): The path to the summary file.
+
+    Returns:
+        dict: The per-file entries of the summary, keyed by path.
+    """
+    try:
+        with open(summary_path, 'r', encoding='utf-8') as summary_file:
+            return json.load(summary_file).get("files", {})
+    except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+        return {}
+
+
+def save_summary(files, summary_path):
+    """
+    Save the per-file entries of a summary.
+
+    Args:
+        files (dict): The per-file entries, keyed by path.
+        summary_path (str): The path to the summary file.
+    """
+    with open(summary_path, 'w', encoding='utf-8') as summary_file:
+        json.dump({"version": 1, "files": files}, summary_file)
+
+
+def _tail_fingerprint(file_path, offset):
+    """
+    Fingerprint the bytes just before an offset.
+
+    Returns:
+        tuple: A hash of the last 64 bytes and whether they end with
+        whitespace.
+    """
+    with open(file_path, 'rb') as file:
+        file.seek(max(0, offset - 64))
+        tail = file.read(offset - max(0, offset - 64))
+    return (hashlib.sha1(tail).hexdigest(),
+            not tail or tail[-1:] in fast_reader.WHITESPACE)
+
+
+def update_file_summary(file_path, entry):
+    """
+    Bring the summary of one file up to date.
+
+    An unchanged file is skipped. When the file grew and the bytes
+    before the previous end still match, only the appended tail is
+    read; otherwise the file is summarized again from the start.
+
+    Args:
+        file_path (str): The path to the file.
+        entry (dict): The saved entry of the file, or None.
+
+    Returns:
+        dict: The updated entry.
+    """
+    file_stat = os.stat(file_path)
+    if (entry and entry["size"] == file_stat.st_size
+            and entry["mtime"] == file_stat.st_mtime):
+        return entry
+
+    offset = 0
+    sketch = SketchStatistics()
+    if (entry and entry["boundary"] and file_stat.st_size > entry["size"]
+            and _tail_fingerprint(file_path, entry["size"])[0]
+            == entry["tail"]):
+        offset = entry["size"]
+        sketch = SketchStatistics.from_dict(entry["sketch"])
+
+    for chunk in fast_reader.iter_number_chunks(
+            file_path, offset=offset, stop=file_stat.st_size):
+        sketch.consume(chunk)
+
+    tail, boundary = _tail_fingerprint(file_path, file_stat.st_size)
+    return {"size": file_stat.st_size,
+            "mtime": file_stat.st_mtime,
+            "tail": tail,
+            "boundary": boundary,
+            "sketch": sketch.to_dict()}
+
+
+def process_incremental(path, summary_path=SUMMARY_FILE,
+                        percentiles=(90, 99)):
+    """
+    Compute statistics reusing the summary saved by a previous run.
+
+    Only new files and the appended part of grown files are read. The
+    median and percentiles are estimated from the sketches; the mode
+    is exact unless more than MODE_CAPACITY distinct values were seen,
+    in which case the report gives the bound on its count.
+
+    Args:
+        path (str): A file, directory or glob pattern.
+        summary_path (str): The path to the summary file.
+        percentiles (iterable): Tail percentiles to report.
+    """
+    files = [path] if os.path.isfile(path) else find_files(path)
+    if not files:
+        print("No files found.")
+        return
+
+    saved = load_summary(summary_path)
+    entries = {}
+    total = SketchStatistics()
+    for file_path in files:
+        key = os.path.abspath(file_path)
+        entries[key] = update_file_summary(file_path, saved.get(key))
+        total.merge(SketchStatistics.from_dict(entries[key]["sketch"]))
+    save_summary(entries, summary_path)
+
+    lines = format_report(total, percentiles=percentiles)
+    lines.append(f"Min: {total.moments.minimum}")
+    lines.append(f"Max: {total.moments.maximum}")
+    lines.append("Median and percentiles are estimated.")
+    heavy_hitters = total.heavy_hitters
+    if heavy_hitters.is_exact():
+        lines.append("Mode is exact.")
+    else:
+        lines.append("Mode is approximate: its count may be overestimated "
+                     f"by up to {heavy_hitters.error_bound():g}.")
+    write_report(lines)
+
+
+def process_rolling(file_path, window, step=1):
+    """
+    Stream rolling statistics over the last ``window`` values of a file.
+
+    A row is emitted every ``step`` values once the window is full, so
+    ``step`` equal to ``window`` gives consecutive non-overlapping
+    groups. Rows are printed and written as they are produced.
+
     Args:
         file_path (str): The path to the file to process.
+        window (int): Number of values in each window.
+        step (int): Number of values between two rows.
+
+    Raises:
+        ValueError: If the window or the step is not positive.
     """
-    numbers = read_file(file_path)
-    count = len(numbers)  # Calculate the count of numbers
-    mean = compute_mean(numbers)
-    median = compute_median(numbers)
-    mode = compute_mode(numbers)
-    variance = compute_variance(numbers, mean)
-    standard_deviation = compute_standard_deviation(numbers, mean)
-
-    print("Descriptive Statistics:")
-    print(f"Count: {count}")  # Display the count of numbers
-    print(f"Mean: {mean}")
-    print(f"Median: {median}")
-    print(f"Mode: {mode}")
-    print(f"Variance: {variance}")
-    print(f"Standard Deviation: {standard_deviation}")
-
-    with open("StatisticsResults.txt", 'w', encoding='utf-8') as result_file:
-        result_file.write("Descriptive Statistics:\n")
-        result_file.write(f"Count: {count}\n")  # Write the count to the file
-        result_file.write(f"Mean: {mean}\n")
-        result_file.write(f"Median: {median}\n")
-        result_file.write(f"Mode: {mode}\n")
-        result_file.write(f"Variance: {variance}\n")
-        result_file.write(f"Standard Deviation: {standard_deviation}\n")
+    if step < 1:
+        raise ValueError("The step must be at least one value.")
+    stats = RollingStatistics(window)
+    header = ("END\tCOUNT\tMEAN\tMEDIAN\tMODE\tVARIANCE"
+              "\tSTANDARD DEVIATION")
+
+    with open(RESULTS_FILE, 'w', encoding='utf-8') as result_file:
+        print("Rolling Statistics:")
+        print(header)
+        result_file.write("Rolling Statistics:\n")
+        result_file.write(header + "\n")
+        for number in iter_numbers(file_path):
+            stats.update(number)
+            if (stats.count < window
+                    or (stats.position - window) % step):
+                continue
+            row = (f"{stats.position}\t{stats.count}\t{stats.mean()}"
+                   f"\t{stats.median()}\t{stats.mode()}"
+                   f"\t{stats.variance()}\t{stats.standard_deviation()}")
+            print(row)
+            result_file.write(row + "\n")
 
 
 def main():
     """
     Main function to execute the script.
     """
-    if len(sys.argv) == 2:
-        file_path = sys.argv[1]
-    else:
-        print("Usage: python compute_statistics.py fileWithData.txt")
-        return
+    parser = argparse.ArgumentParser(
+        usage="python compute_statistics.py fileWithData.txt")
+    parser.add_argument("path", help="file, directory or glob pattern")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes for directory mode")
+    parser.add_argument("--incremental", action="store_true",
+                        help="reuse and update " + SUMMARY_FILE)
+    parser.add_argument("--window", type=int, default=None,
+                        help="rolling statistics over the last N values")
+    parser.add_argument("--step", type=int, default=1,
+                        help="values between rolling rows")
+    parser.add_argument("--no-median", dest="median", action="store_false",
+                        help="skip the median and percentiles, which "
+                             "keep every value in memory")
+    parser.add_argument("--no-mode", dest="mode", action="store_false",
+                        help="skip the mode, which keeps a frequency "
+                             "table in memory")
+    args = parser.parse_args()
+
+    if args.window is not None and args.window < 1:
+        parser.error("--window must be at least 1")
+    if args.step < 1:
+        parser.error("--step must be at least 1")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if (args.window is not None or args.incremental) and not (
+            args.median and args.mode):
+        parser.error("--no-median and --no-mode only apply to file and "
+                     "directory mode")
 
-    if not file_path:
+    if not args.path:
         print("No file selected.")
         return
 
     start_time = time.time()
 
-    process_file(file_path)
+    if args.window is not None:
+        process_rolling(args.path, args.window, args.step)
+    elif args.incremental:
+        process_incremental(args.path)
+    elif os.path.isfile(args.path):
+        process_file(args.path, args.median, args.mode)
+    else:
+        process_directory(args.path, args.workers,
+                          with_median=args.median, with_mode=args.mode)
 
     end_time = time.time()
     elapsed_time = end_time - start_time
 
     print(f"Time elapsed: {elapsed_time} seconds")
 
-    with open("StatisticsResults.txt", 'a', encoding='utf-8') as result_file:
+    with open(RESULTS_FILE, 'a', encoding='utf-8') as result_file:
         result_file.write(f"Time elapsed: {elapsed_time} seconds\n")
 
 
@@ -5,14 +5,27 @@ Converts numbers from a file into binary and hexadecimal representation.
 This script reads numbers from a file, converts them to binary and hexadecimal,
 and saves the results in a text file named ConversionResults.txt.
 
-Usage: python convert_numbers.py fileWithData.txt
+Usage: python convert_numbers.py fileWithData.txt [--workers N] [--quiet]
+                                  [--format text|tsv|csv]
 
 Author: Najk
 Date: 01-02-2024.
 """
 
+import argparse
+import functools
 import sys
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import fast_reader
+
+RESULTS_FILE = "ConversionResults.txt"
+CHUNK_SIZE = 65536
+WRITE_BUFFER = 1 << 20
+FORMATS = ("text", "tsv", "csv")
+_CONVERTER = None
 
 
 def read_file(file_name):
@@ -26,125 +39,386 @@ def read_file(file_name):
         list: A list of numbers read from the file.
     """
     numbers = []
-    try:
-        with open(file_name, 'r', encoding='utf-8') as file:
-            for line in file:
-                try:
-                    number = float(line.strip())
-                    if number.is_integer():
-                        numbers.append(int(number))
-                    else:
-                        numbers.append(number)
-                except ValueError:
-                    print(f"Invalid data: '{line.strip()}'")
-    except FileNotFoundError:
-        print("File not found.")
+    for chunk in fast_reader.iter_number_chunks(file_name):
+        numbers.extend(chunk)
     return numbers
 
 
-def convert_to_binary(number):
+def _fraction_digits(fraction, bits_per_digit, max_digits=None,
+                     rounding="truncate", integer_odd=False):
+    """
+    Expand the fractional part of a float in a power-of-two base.
+
+    The fraction is an exact dyadic rational n / 2**k, so its digits
+    are the bits of n, left-padded to k bits and regrouped; no loop
+    over the digits is needed.
+
+    Args:
+        fraction (float): The fractional part, in [0, 1).
+        bits_per_digit (int): 1 for binary, 4 for hexadecimal.
+        max_digits (int): Maximum number of digits, or None for the
+        exact expansion.
+        rounding (str): "truncate" or "nearest" (ties to even) when
+        digits are dropped.
+        integer_odd (bool): Whether the integer part is odd, which
+        decides a tie when no fractional digit is kept.
+
+    Returns:
+        tuple: The carry into the integer part (0 or 1) and the digit
+        string without trailing zeros.
+
+    Raises:
+        ValueError: If the rounding mode is unknown or max_digits is
+        negative.
+    """
+    if rounding not in ("truncate", "nearest"):
+        raise ValueError(f"Unknown rounding mode: {rounding}")
+    if max_digits is not None and max_digits < 0:
+        raise ValueError("max_digits must not be negative.")
+    numerator, denominator = fraction.as_integer_ratio()
+    exponent = denominator.bit_length() - 1
+    digit_count = -(-exponent // bits_per_digit)
+    if max_digits is not None and max_digits < digit_count:
+        shift = exponent - max_digits * bits_per_digit
+        scaled = numerator >> shift
+        remainder = numerator - (scaled << shift)
+        if rounding == "nearest" and remainder:
+            half = 1 << (shift - 1)
+            odd = scaled & 1 if max_digits else integer_odd
+            if remainder > half or (remainder == half and odd):
+                scaled += 1
+        digit_count = max_digits
+        if scaled >> (digit_count * bits_per_digit):
+            return 1, ""
+    else:
+        scaled = numerator << (digit_count * bits_per_digit - exponent)
+    if not digit_count:
+        return 0, ""
+    if bits_per_digit == 1:
+        digits = format(scaled, 'b')
+    else:
+        digits = format(scaled, 'X')
+    return 0, digits.zfill(digit_count).rstrip('0')
+
+
+def convert_to_binary(number, max_digits=None, rounding="truncate"):
     """
     Convert a number to binary.
 
     Args:
         number (float): The number to convert.
+        max_digits (int): Maximum number of fractional digits, or None
+        for the exact expansion.
+        rounding (str): "truncate" or "nearest" when digits are dropped.
 
     Returns:
         str: The binary representation of the number.
     """
     if number < 0:
-        return "-" + convert_to_binary(-number)
+        return "-" + convert_to_binary(-number, max_digits, rounding)
     integer_part = int(number)
     fractional_part = number - integer_part
-    integer_binary = bin(integer_part)[2:]
     if fractional_part == 0:
+        return bin(integer_part)[2:]
+    carry, fractional_binary = _fraction_digits(
+        float(fractional_part), 1, max_digits, rounding, integer_part & 1)
+    integer_binary = bin(integer_part + carry)[2:]
+    if not fractional_binary:
         return integer_binary
-    fractional_binary = ""
-    while fractional_part:
-        fractional_part *= 2
-        bit = int(fractional_part)
-        fractional_binary += str(bit)
-        fractional_part -= bit
-    return integer_binary + "." + fractional_binary.rstrip('0')
+    return integer_binary + "." + fractional_binary
 
 
-def convert_to_hexadecimal(number):
+def convert_to_hexadecimal(number, max_digits=None, rounding="truncate"):
     """
     Convert a number to hexadecimal.
 
     Args:
         number (float): The number to convert.
+        max_digits (int): Maximum number of fractional digits, or None
+        for the exact expansion.
+        rounding (str): "truncate" or "nearest" when digits are dropped.
 
     Returns:
         str: The hexadecimal representation of the number.
     """
     if number < 0:
-        return "-" + convert_to_hexadecimal(-number)
+        return "-" + convert_to_hexadecimal(-number, max_digits, rounding)
     integer_part = int(number)
     fractional_part = number - integer_part
-    integer_hex = hex(integer_part)[2:]
     if fractional_part == 0:
+        return hex(integer_part)[2:]
+    carry, fractional_hex = _fraction_digits(
+        float(fractional_part), 4, max_digits, rounding, integer_part & 1)
+    integer_hex = hex(integer_part + carry)[2:]
+    if not fractional_hex:
         return integer_hex
-    fractional_hex = ""
-    while fractional_part:
-        fractional_part *= 16
-        digit = int(fractional_part)
-        if digit < 10:
-            fractional_hex += str(digit)
-        else:
-            fractional_hex += chr(ord('A') + digit - 10)
-        fractional_part -= digit
-    return integer_hex + "." + fractional_hex.rstrip('0')
+    return integer_hex + "." + fractional_hex
+
+
+def convert_number(number, max_digits=None, rounding="truncate"):
+    """
+    Convert a number to binary and hexadecimal together.
+
+    The integer and fractional parts are split once and both digit
+    strings are built from the same exact fraction.
+
+    Args:
+        number (float): The number to convert.
+        max_digits (int): Maximum number of fractional digits, or None
+        for the exact expansion.
+        rounding (str): "truncate" or "nearest" when digits are dropped.
+
+    Returns:
+        tuple: The binary and the hexadecimal representations.
+    """
+    if max_digits is not None:
+        return (convert_to_binary(number, max_digits, rounding),
+                convert_to_hexadecimal(number, max_digits, rounding))
+    if number < 0:
+        binary, hexadecimal = convert_number(-number)
+        return "-" + binary, "-" + hexadecimal
+    integer_part = int(number)
+    fractional_part = number - integer_part
+    if fractional_part == 0:
+        return bin(integer_part)[2:], hex(integer_part)[2:]
+    fractional_part = float(fractional_part)
+    return (bin(integer_part)[2:] + "."
+            + _fraction_digits(fractional_part, 1)[1],
+            hex(integer_part)[2:] + "."
+            + _fraction_digits(fractional_part, 4)[1])
+
+
+class BatchConverter:
+    """
+    Converts sequences of numbers through a bounded LRU cache.
+
+    Repeated values are converted once while they stay in the cache,
+    and the cache statistics tell how well the size fits the input.
+    """
+
+    def __init__(self, cache_size=65536, max_digits=None,
+                 rounding="truncate"):
+        """
+        Initialize the converter.
+
+        Args:
+            cache_size (int): Maximum number of distinct values cached.
+            max_digits (int): Maximum number of fractional digits, or
+            None for the exact expansion.
+            rounding (str): "truncate" or "nearest" when digits are
+            dropped.
+        """
+        self._convert = functools.lru_cache(maxsize=cache_size)(
+            functools.partial(convert_number, max_digits=max_digits,
+                              rounding=rounding))
+
+    def convert(self, numbers):
+        """
+        Convert a sequence of numbers.
+
+        Args:
+            numbers (iterable): The numbers to convert.
+
+        Returns:
+            list: A (binary, hexadecimal) tuple per number, in input
+            order.
+        """
+        convert = self._convert
+        return [convert(number) for number in numbers]
+
+    def cache_info(self):
+        """Return the hits, misses, maximum size and size of the cache."""
+        return self._convert.cache_info()
+
+    def hit_rate(self):
+        """Return the fraction of lookups served by the cache."""
+        info = self._convert.cache_info()
+        lookups = info.hits + info.misses
+        return info.hits / lookups if lookups else 0.0
+
+
+def iter_number_chunks(file_name):
+    """
+    Yield the numbers of a file a chunk at a time.
+
+    The file is read through fast_reader, so only one block of it is
+    held in memory at a time.
+
+    Args:
+        file_name (str): The name of the file to read.
+
+    Yields:
+        list: Consecutive chunks of numbers.
+    """
+    yield from fast_reader.iter_number_chunks(
+        file_name, block_size=CHUNK_SIZE * 8)
+
+
+def convert_chunk(numbers):
+    """
+    Convert a chunk of numbers with the process-wide cached converter.
+
+    Args:
+        numbers (list): The numbers to convert.
+
+    Returns:
+        tuple: The (binary, hexadecimal) conversions, and the cache hits
+        and misses of this chunk.
+    """
+    global _CONVERTER  # pylint: disable=global-statement
+    if _CONVERTER is None:
+        _CONVERTER = BatchConverter()
+    before = _CONVERTER.cache_info()
+    conversions = _CONVERTER.convert(numbers)
+    after = _CONVERTER.cache_info()
+    return (conversions, after.hits - before.hits,
+            after.misses - before.misses)
+
+
+def iter_converted_chunks(chunks, workers=1):
+    """
+    Convert chunks of numbers, in parallel when workers > 1.
+
+    At most two chunks per worker are in flight, so memory stays
+    bounded, and chunks are yielded in input order.
+
+    Args:
+        chunks (iterable): Chunks of numbers.
+        workers (int): Number of worker processes.
+
+    Yields:
+        tuple: Each chunk of numbers with the result of convert_chunk.
+    """
+    if workers <= 1:
+        for numbers in chunks:
+            yield numbers, convert_chunk(numbers)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for numbers in chunks:
+            pending.append((numbers, executor.submit(convert_chunk, numbers)))
+            if len(pending) >= 2 * workers:
+                numbers, future = pending.popleft()
+                yield numbers, future.result()
+        while pending:
+            numbers, future = pending.popleft()
+            yield numbers, future.result()
+
+
+def format_header(file_name, output_format="text"):
+    """
+    Return the header lines of the results.
+
+    The text format keeps the original layout; TSV and CSV have one
+    header row with a column per field.
+    """
+    if output_format == "text":
+        return ("Conversion Results:\n"
+                "NUMBER\t" + file_name.strip('.txt') + "\tBIN\t\t\t\tHEX\n")
+    separator = "\t" if output_format == "tsv" else ","
+    return separator.join(("INDEX", "NUMBER", "BIN", "HEX")) + "\n"
+
+
+def format_rows(start, numbers, conversions, output_format="text"):
+    """
+    Format a chunk of results as one string.
+
+    Args:
+        start (int): The index of the first row.
+        numbers (list): The numbers of the chunk.
+        conversions (list): Their (binary, hexadecimal) conversions.
+        output_format (str): "text", "tsv" or "csv".
+
+    Returns:
+        str: The formatted rows.
+    """
+    if output_format == "text":
+        template = "{}\t{}\t{}\t\t{}\n"
+    elif output_format == "tsv":
+        template = "{}\t{}\t{}\t{}\n"
+    else:
+        template = "{},{},{},{}\n"
+    return "".join(
+        template.format(index, number, binary, hexadecimal)
+        for index, (number, (binary, hexadecimal))
+        in enumerate(zip(numbers, conversions), start))
 
 
-def process_file(file_name):
+def process_file(file_name, workers=1, output_format="text", quiet=False):
     """
     Process a file to convert numbers to binary and hexadecimal.
 
+    Numbers are converted and written a chunk at a time through a large
+    write buffer, so the whole file is never held in memory.
+
     Args:
         file_name (str): The name of the file to process.
+        workers (int): Number of worker processes.
+        output_format (str): "text", "tsv" or "csv".
+        quiet (bool): Do not echo the results to the console.
+
+    Raises:
+        ValueError: If the output format is unknown.
     """
-    numbers = read_file(file_name)
-    binary_results = [
-        convert_to_binary(number) for number in numbers]
-    hexadecimal_results = [
-        convert_to_hexadecimal(number) for number in numbers]
+    if output_format not in FORMATS:
+        raise ValueError(f"Unknown output format: {output_format}")
+    hits = misses = 0
+    index = 1
+    header = format_header(file_name, output_format)
 
-    with open("ConversionResults.txt", 'w', encoding='utf-8') as result_file:
-        result_file.write("Conversion Results:\n")
-        result_file.write(
-            "NUMBER\t"+file_name.strip('.txt')+"\tBIN\t\t\t\tHEX\n")
+    with open(RESULTS_FILE, 'w', encoding='utf-8',
+              buffering=WRITE_BUFFER) as result_file:
+        result_file.write(header)
+        if not quiet:
+            sys.stdout.write(header)
+        chunks = iter_number_chunks(file_name)
+        for numbers, (conversions, chunk_hits, chunk_misses) in (
+                iter_converted_chunks(chunks, workers)):
+            rows = format_rows(index, numbers, conversions, output_format)
+            result_file.write(rows)
+            if not quiet:
+                sys.stdout.write(rows)
+            index += len(numbers)
+            hits += chunk_hits
+            misses += chunk_misses
 
-        print("Conversion Results:")
-        print("NUMBER\t"+file_name.strip('.txt')+"\tBIN\t\t\t\tHEX")
-        for i, (number, binary, hexadecimal) in enumerate(
-                zip(numbers, binary_results, hexadecimal_results)):
-            print(f"{i + 1}\t{number}\t{binary}\t\t{hexadecimal}")
-            result_file.write(
-                f"{i + 1}\t{number}\t{binary}\t\t{hexadecimal}\n")
+    lookups = hits + misses
+    hit_rate = hits / lookups if lookups else 0.0
+    print(f"Conversion cache: {hits} hits, {misses} misses, "
+          f"hit rate {hit_rate:.2%}")
 
 
 def main():
     """
     Main function to execute the script.
     """
-    if len(sys.argv) != 2:
-        print("Usage: python convert_numbers.py fileWithData.txt")
-        return
+    parser = argparse.ArgumentParser(
+        usage="python convert_numbers.py fileWithData.txt")
+    parser.add_argument("file_name")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes converting chunks")
+    parser.add_argument("--quiet", action="store_true",
+                        help="do not echo the results to the console")
+    parser.add_argument("--format", choices=FORMATS, default="text",
+                        dest="output_format")
+    args = parser.parse_args()
 
-    file_name = sys.argv[1]
+    file_name = args.file_name
 
     start_time = time.time()
 
-    process_file(file_name)
+    process_file(file_name, workers=args.workers,
+                 output_format=args.output_format, quiet=args.quiet)
 
     end_time = time.time()
     elapsed_time = end_time - start_time
 
     print(f"Time elapsed: {elapsed_time} seconds")
 
-    with open("ConversionResults.txt", 'a', encoding='utf-8') as result_file:
-        result_file.write(f"Time elapsed: {elapsed_time} seconds\n")
+    # The TSV and CSV results stay a plain table.
+    if args.output_format == "text":
+        with open(RESULTS_FILE, 'a', encoding='utf-8') as result_file:
+            result_file.write(f"Time elapsed: {elapsed_time} seconds\n")
 
 if __name__ == "__main__":
     main()
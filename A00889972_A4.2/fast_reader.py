@@ -0,0 +1,287 @@
+"""
+
+Fast ingestion layer shared by the A4.2 scripts.
+
+This module memory-maps an input file and splits it into blocks that
+end on a whitespace boundary. Each block is tokenized as raw bytes and
+converted in bulk, so the scripts receive numbers or words a chunk at a
+time instead of decoding and parsing one line at a time.
+
+Invalid numeric tokens are skipped and collected in an InvalidTokens
+report, which is printed once as a summary rather than once per line.
+
+Author: Najk
+Date: 01-02-2024.
+"""
+
+import hashlib
+import mmap
+import os
+from collections import Counter
+
+BLOCK_SIZE = 1 << 20
+WHITESPACE = b" \t\n\r\x0b\x0c"
+
+
+class InvalidTokens:
+    """
+    Aggregate report of the tokens that could not be parsed.
+    """
+
+    def __init__(self, max_samples=5):
+        """
+        Initialize an empty report.
+
+        Args:
+            max_samples (int): How many invalid tokens to keep as
+            examples.
+        """
+        self.count = 0
+        self.samples = []
+        self.max_samples = max_samples
+
+    def add(self, token):
+        """
+        Record an invalid token.
+
+        Args:
+            token (bytes): The token that could not be parsed.
+        """
+        self.count += 1
+        if len(self.samples) < self.max_samples:
+            self.samples.append(token.decode('utf-8', 'replace'))
+
+    def summary(self):
+        """
+        Return a one-line summary, or None if every token was valid.
+        """
+        if not self.count:
+            return None
+        examples = ", ".join(f"'{sample}'" for sample in self.samples)
+        return f"Invalid data: {self.count} token(s) skipped ({examples})"
+
+    def print_summary(self):
+        """Print the summary if any token was invalid."""
+        summary = self.summary()
+        if summary:
+            print(summary)
+
+
+def _block_end(data, start, size, block_size):
+    """
+    Return the end of the block starting at ``start``.
+
+    The block ends right after the last newline within ``block_size``
+    bytes, or after any other whitespace when the line is longer than
+    that.
+    """
+    end = start + block_size
+    if end >= size:
+        return size
+    newline = data.rfind(b"\n", start, end)
+    if newline != -1:
+        return newline + 1
+    previous = max(data.rfind(WHITESPACE[i:i + 1], start, end)
+                   for i in range(len(WHITESPACE)))
+    if previous != -1:
+        return previous + 1
+    return _next_boundary(data, end, size)
+
+
+def _next_boundary(data, position, size):
+    """Return the offset just after the first whitespace at or after
+    ``position``, or ``size`` if there is none."""
+    following = [data.find(WHITESPACE[i:i + 1], position)
+                 for i in range(len(WHITESPACE))]
+    following = [found for found in following if found != -1]
+    return min(following) + 1 if following else size
+
+
+def split_ranges(file_name, parts):
+    """
+    Split a file into byte ranges that never split a token.
+
+    Args:
+        file_name (str): The name of the file to split.
+        parts (int): The number of ranges wanted.
+
+    Returns:
+        list: (start, stop) byte offsets, possibly fewer than ``parts``
+        for small files.
+    """
+    with open(file_name, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if not size:
+            return []
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            bounds = [0]
+            for part in range(1, parts):
+                boundary = _next_boundary(data, size * part // parts, size)
+                if bounds[-1] < boundary < size:
+                    bounds.append(boundary)
+            bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def iter_blocks(file_name, block_size=BLOCK_SIZE, offset=0, stop=None):
+    """
+    Yield a file as byte blocks that never split a token.
+
+    Args:
+        file_name (str): The name of the file to read.
+        block_size (int): Approximate size of each block in bytes.
+        offset (int): Byte offset to start reading from.
+        stop (int): Byte offset to stop reading at; the end of the file
+        by default.
+
+    Yields:
+        bytes: Consecutive blocks of the file.
+    """
+    try:
+        with open(file_name, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            if stop is not None:
+                size = min(size, stop)
+            if offset >= size:
+                return
+            with mmap.mmap(file.fileno(), 0,
+                           access=mmap.ACCESS_READ) as data:
+                start = offset
+                while start < size:
+                    end = _block_end(data, start, size, block_size)
+                    yield data[start:end]
+                    start = end
+    except FileNotFoundError:
+        print("File not found.")
+
+
+def parse_floats(tokens, report):
+    """
+    Convert byte tokens to floats, skipping the invalid ones.
+
+    Args:
+        tokens (list): The byte tokens to convert.
+        report (InvalidTokens): Where invalid tokens are recorded.
+
+    Returns:
+        list: The floats.
+    """
+    try:
+        return list(map(float, tokens))
+    except ValueError:
+        values = []
+        for token in tokens:
+            try:
+                values.append(float(token))
+            except ValueError:
+                report.add(token)
+        return values
+
+
+def parse_numbers(tokens, report):
+    """
+    Convert byte tokens to numbers, skipping the invalid ones.
+
+    Args:
+        tokens (list): The byte tokens to convert.
+        report (InvalidTokens): Where invalid tokens are recorded.
+
+    Returns:
+        list: The numbers, with integral values as int.
+    """
+    return [int(value) if value.is_integer() else value
+            for value in parse_floats(tokens, report)]
+
+
+def iter_number_chunks(file_name, report=None, block_size=BLOCK_SIZE,
+                       offset=0, stop=None, as_float=False):
+    """
+    Yield the numbers of a file a chunk at a time.
+
+    Tokens are separated by any whitespace. When no report is given,
+    a summary of the invalid tokens is printed at the end.
+
+    Args:
+        file_name (str): The name of the file to read.
+        report (InvalidTokens): Collects the invalid tokens.
+        block_size (int): Approximate size of each block in bytes.
+        offset (int): Byte offset to start reading from.
+        stop (int): Byte offset to stop reading at.
+        as_float (bool): Keep integral values as float, e.g. to build
+        an array from the chunks.
+
+    Yields:
+        list: The numbers of each block, with integral values as int
+        unless ``as_float`` is set.
+    """
+    owns_report = report is None
+    if owns_report:
+        report = InvalidTokens()
+    parse = parse_floats if as_float else parse_numbers
+    for block in iter_blocks(file_name, block_size, offset, stop):
+        numbers = parse(block.split(), report)
+        if numbers:
+            yield numbers
+    if owns_report:
+        report.print_summary()
+
+
+def iter_word_chunks(file_name, block_size=BLOCK_SIZE, offset=0, stop=None):
+    """
+    Yield the whitespace-separated words of a file a chunk at a time.
+
+    Blocks end on ASCII whitespace, which never occurs inside a UTF-8
+    multi-byte sequence, so each block decodes on its own.
+
+    Args:
+        file_name (str): The name of the file to read.
+        block_size (int): Approximate size of each block in bytes.
+        offset (int): Byte offset to start reading from.
+        stop (int): Byte offset to stop reading at.
+
+    Yields:
+        list: The words of each block.
+    """
+    for block in iter_blocks(file_name, block_size, offset, stop):
+        words = block.decode('utf-8').split()
+        if words:
+            yield words
+
+
+def count_words(file_name, block_size=BLOCK_SIZE, offset=0, stop=None):
+    """
+    Count the frequency of each word in a file, or a byte range of it.
+
+    Each chunk of words is fed straight into a Counter, so memory grows
+    with the number of distinct words rather than the size of the file.
+    Words keep the order of their first appearance.
+
+    Args:
+        file_name (str): The name of the file to read.
+        block_size (int): Approximate size of each block in bytes.
+        offset (int): Byte offset to start reading from.
+        stop (int): Byte offset to stop reading at.
+
+    Returns:
+        Counter: The frequency of each word.
+    """
+    word_count = Counter()
+    for chunk in iter_word_chunks(file_name, block_size, offset, stop):
+        word_count.update(chunk)
+    return word_count
+
+
+def file_digest(file_name):
+    """
+    Return the SHA-1 hash of a file's content.
+
+    Args:
+        file_name (str): The name of the file to hash.
+
+    Returns:
+        str: The hexadecimal digest.
+    """
+    digest = hashlib.sha1()
+    for block in iter_blocks(file_name):
+        digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,276 @@
+"""
+
+Descriptive statistics over a sliding window of numbers.
+
+RollingStatistics keeps the last N values with exact running sums of
+the values and their squares, the median with two lazily pruned heaps
+and the mode with a frequency table that also supports removals. Each statistic
+follows the same definition as the compute_* functions of
+compute_statistics.
+
+Author: Najk
+Date: 01-02-2024.
+"""
+
+import heapq
+import math
+from collections import deque
+from fractions import Fraction
+
+
+class SlidingMedian:
+    """
+    Median of a multiset that supports insertions and removals.
+
+    The lower half is kept in a max-heap and the upper half in a
+    min-heap. Removed values are only discarded once they reach the top
+    of a heap, so both operations take O(log n) amortized time.
+    """
+
+    def __init__(self):
+        """Initialize an empty multiset."""
+        self._low = []
+        self._high = []
+        self._low_size = 0
+        self._high_size = 0
+        self._delayed = {}
+
+    def _prune(self, heap, sign):
+        """Pop values pending removal from the top of a heap."""
+        while heap:
+            number = sign * heap[0]
+            pending = self._delayed.get(number)
+            if not pending:
+                return
+            if pending == 1:
+                del self._delayed[number]
+            else:
+                self._delayed[number] = pending - 1
+            heapq.heappop(heap)
+
+    def _rebalance(self):
+        """Keep the lower half equal to or one larger than the upper."""
+        if self._low_size > self._high_size + 1:
+            heapq.heappush(self._high, -heapq.heappop(self._low))
+            self._low_size -= 1
+            self._high_size += 1
+            self._prune(self._low, -1)
+        elif self._low_size < self._high_size:
+            heapq.heappush(self._low, -heapq.heappop(self._high))
+            self._high_size -= 1
+            self._low_size += 1
+            self._prune(self._high, 1)
+
+    def add(self, number):
+        """Insert a number."""
+        if not self._low or number <= -self._low[0]:
+            heapq.heappush(self._low, -number)
+            self._low_size += 1
+        else:
+            heapq.heappush(self._high, number)
+            self._high_size += 1
+        self._rebalance()
+
+    def remove(self, number):
+        """Remove one occurrence of a number that was inserted before."""
+        self._delayed[number] = self._delayed.get(number, 0) + 1
+        if number <= -self._low[0]:
+            self._low_size -= 1
+            if number == -self._low[0]:
+                self._prune(self._low, -1)
+        else:
+            self._high_size -= 1
+            if number == self._high[0]:
+                self._prune(self._high, 1)
+        self._rebalance()
+
+    def median(self):
+        """Return the median, or None if the multiset is empty."""
+        if not self._low_size:
+            return None
+        if self._low_size > self._high_size:
+            return -self._low[0]
+        return (-self._low[0] + self._high[0]) / 2
+
+
+class SlidingMode:
+    """
+    Mode of a multiset that supports insertions and removals.
+
+    Values are grouped by frequency so the highest frequency is known
+    at any time. Ties are broken like compute_mode: by the earliest
+    position of each value still in the window.
+    """
+
+    def __init__(self):
+        """Initialize an empty multiset."""
+        self._positions = {}
+        self._buckets = {}
+        self._max_frequency = 0
+
+    def _move(self, number, old, new):
+        """Move a number from one frequency bucket to another."""
+        if old:
+            bucket = self._buckets[old]
+            del bucket[number]
+            if not bucket:
+                del self._buckets[old]
+        if new:
+            self._buckets.setdefault(new, {})[number] = None
+
+    def add(self, number, position):
+        """
+        Insert a number.
+
+        Args:
+            number (float): The number to insert.
+            position (int): Its position in the input.
+        """
+        positions = self._positions.setdefault(number, deque())
+        positions.append(position)
+        frequency = len(positions)
+        self._move(number, frequency - 1, frequency)
+        self._max_frequency = max(self._max_frequency, frequency)
+
+    def remove(self, number):
+        """Remove the oldest occurrence of a number."""
+        positions = self._positions[number]
+        positions.popleft()
+        frequency = len(positions)
+        if not frequency:
+            del self._positions[number]
+        self._move(number, frequency + 1, frequency)
+        if self._max_frequency not in self._buckets:
+            self._max_frequency -= 1
+
+    @property
+    def max_frequency(self):
+        """Return the highest frequency of any value."""
+        return self._max_frequency
+
+    def mode(self):
+        """Return the mode, or None if the multiset is empty."""
+        if not self._max_frequency:
+            return None
+        candidates = self._buckets[self._max_frequency]
+        return min(candidates, key=lambda number: self._positions[number][0])
+
+
+def _exact(number):
+    """Return a number as an int or a Fraction, without rounding."""
+    return number if isinstance(number, int) else Fraction(number)
+
+
+class RollingStatistics:
+    """
+    Descriptive statistics of the last ``window`` numbers added.
+
+    The sum of the values and the sum of their squares are kept exact,
+    as ints or Fractions, so removing a large value from the window
+    leaves no rounding error behind. While the window holds an infinity
+    or a NaN, the moments are computed from the values instead.
+    """
+
+    def __init__(self, window, track_median=True, track_mode=True):
+        """
+        Initialize an empty window.
+
+        Args:
+            window (int): Number of values in the window.
+            track_median (bool): Maintain the sliding median.
+            track_mode (bool): Maintain the sliding mode.
+
+        Raises:
+            ValueError: If the window is not positive.
+        """
+        if window < 1:
+            raise ValueError("The window must hold at least one value.")
+        self.window = window
+        self.position = 0
+        self._values = deque()
+        self._total = 0
+        self._squares = 0
+        self._non_finite = 0
+        self._median = SlidingMedian() if track_median else None
+        self._mode = SlidingMode() if track_mode else None
+
+    @property
+    def count(self):
+        """Return the number of values in the window."""
+        return len(self._values)
+
+    def _add(self, number):
+        """Add a value to the moments and the optional trackers."""
+        self._values.append(number)
+        if math.isfinite(number):
+            exact = _exact(number)
+            self._total += exact
+            self._squares += exact * exact
+        else:
+            self._non_finite += 1
+        if self._median is not None:
+            self._median.add(number)
+        if self._mode is not None:
+            self._mode.add(number, self.position)
+
+    def _remove_oldest(self):
+        """Remove the oldest value from the window."""
+        number = self._values.popleft()
+        if math.isfinite(number):
+            exact = _exact(number)
+            self._total -= exact
+            self._squares -= exact * exact
+        else:
+            self._non_finite -= 1
+        if self._median is not None:
+            self._median.remove(number)
+        if self._mode is not None:
+            self._mode.remove(number)
+
+    def update(self, number):
+        """
+        Add a number, dropping the oldest one if the window is full.
+
+        Args:
+            number (float): The number to add.
+        """
+        if len(self._values) == self.window:
+            self._remove_oldest()
+        self._add(number)
+        self.position += 1
+
+    def mean(self):
+        """Return the mean of the window, or None if empty."""
+        if not self._values:
+            return None
+        if self._non_finite:
+            return sum(self._values) / len(self._values)
+        return float(self._total / len(self._values))
+
+    def variance(self):
+        """Return the population variance of the window, or None."""
+        if not self._values:
+            return None
+        count = len(self._values)
+        if self._non_finite:
+            mean = self.mean()
+            return sum((x - mean) ** 2 for x in self._values) / count
+        return float((count * self._squares - self._total * self._total)
+                     / (count * count))
+
+    def standard_deviation(self):
+        """Return the population standard deviation of the window."""
+        variance = self.variance()
+        return variance ** 0.5 if variance else None
+
+    def median(self):
+        """Return the median of the window."""
+        return self._median.median() if self._median is not None else None
+
+    def mode(self):
+        """Return the mode of the window."""
+        if self._mode is None:
+            return None
+        if self._mode.max_frequency == 1:
+            return self._values[0]
+        return self._mode.mode()
@@ -0,0 +1,310 @@
+"""
+
+Mergeable summaries for large streams of values.
+
+TDigest estimates quantiles from a bounded number of centroids and
+SpaceSaving keeps the most frequent values in a bounded table. Both can
+be merged with other instances and saved to and loaded from plain
+dictionaries, so they can be persisted as JSON between runs.
+
+Author: Najk
+Date: 01-02-2024.
+"""
+
+import heapq
+import math
+
+
+class TDigest:
+    """
+    Merging t-digest for quantile estimation.
+
+    Points are buffered and periodically merged into centroids whose
+    size is bounded by the arcsine scale function, which keeps the
+    tails more accurate than the middle.
+    """
+
+    def __init__(self, compression=100):
+        """
+        Initialize an empty digest.
+
+        Args:
+            compression (int): Controls the number of centroids kept;
+            higher is more accurate and larger.
+        """
+        self.compression = compression
+        self.centroids = []
+        self.count = 0
+        self.minimum = None
+        self.maximum = None
+        self._buffer = []
+
+    def update(self, number, weight=1):
+        """
+        Add a number to the digest.
+
+        Args:
+            number (float): The number to add.
+            weight (int): How many times the number occurs.
+        """
+        number = float(number)
+        self._buffer.append((number, weight))
+        self.count += weight
+        if self.minimum is None or number < self.minimum:
+            self.minimum = number
+        if self.maximum is None or number > self.maximum:
+            self.maximum = number
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def merge(self, other):
+        """
+        Merge another digest into this one.
+
+        Args:
+            other (TDigest): The digest to merge.
+
+        Returns:
+            TDigest: The digest itself.
+        """
+        other._compress()
+        for mean, weight in other.centroids:
+            self.update(mean, weight)
+        if other.minimum is not None and other.minimum < self.minimum:
+            self.minimum = other.minimum
+        if other.maximum is not None and other.maximum > self.maximum:
+            self.maximum = other.maximum
+        return self
+
+    def _scale(self, quantile):
+        """Map a quantile to the k scale."""
+        return self.compression / (2 * math.pi) * math.asin(2 * quantile - 1)
+
+    def _inverse_scale(self, k_value):
+        """Map a k scale value back to a quantile."""
+        return (math.sin(k_value * 2 * math.pi / self.compression) + 1) / 2
+
+    def _compress(self):
+        """Merge the buffered points into the centroids."""
+        if not self._buffer:
+            return
+        points = sorted(self.centroids + self._buffer)
+        self._buffer = []
+        total = self.count
+        merged = []
+        cumulative = 0
+        limit = self._inverse_scale(self._scale(0) + 1) * total
+        mean, weight = points[0]
+        for point_mean, point_weight in points[1:]:
+            if cumulative + weight + point_weight <= limit:
+                weight += point_weight
+                mean += (point_mean - mean) * point_weight / weight
+            else:
+                merged.append((mean, weight))
+                cumulative += weight
+                limit = self._inverse_scale(
+                    self._scale(min(cumulative / total, 1)) + 1) * total
+                mean, weight = point_mean, point_weight
+        merged.append((mean, weight))
+        self.centroids = merged
+
+    def quantile(self, quantile):
+        """
+        Estimate a quantile.
+
+        Args:
+            quantile (float): The quantile, from 0 to 1.
+
+        Returns:
+            float: The estimated value, or None if the digest is empty.
+        """
+        self._compress()
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1:
+            return self.centroids[0][0]
+        target = quantile * self.count
+        previous_mean = self.minimum
+        previous_position = 0
+        cumulative = 0
+        for mean, weight in self.centroids:
+            position = cumulative + weight / 2
+            if target < position:
+                if position == previous_position:
+                    return mean
+                fraction = ((target - previous_position)
+                            / (position - previous_position))
+                return previous_mean + (mean - previous_mean) * fraction
+            previous_mean, previous_position = mean, position
+            cumulative += weight
+        if self.count == previous_position:
+            return self.maximum
+        fraction = ((target - previous_position)
+                    / (self.count - previous_position))
+        return previous_mean + (self.maximum - previous_mean) * fraction
+
+    def to_dict(self):
+        """Return the digest as a JSON-serializable dictionary."""
+        self._compress()
+        return {"compression": self.compression,
+                "count": self.count,
+                "minimum": self.minimum,
+                "maximum": self.maximum,
+                "centroids": [list(centroid) for centroid in self.centroids]}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create a digest from a dictionary made by to_dict."""
+        digest = cls(data["compression"])
+        digest.count = data["count"]
+        digest.minimum = data["minimum"]
+        digest.maximum = data["maximum"]
+        digest.centroids = [tuple(centroid) for centroid in data["centroids"]]
+        return digest
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitter table.
+
+    Tracks at most ``capacity`` values. Counts are exact while fewer
+    distinct values than that have been seen; afterwards each count
+    overestimates the true frequency by at most its recorded error,
+    which never exceeds total / capacity.
+
+    The value to evict is found with a min-heap whose entries may lag
+    behind the counts; a stale entry is refreshed when it reaches the
+    top, so increments stay O(1) and evictions O(log capacity)
+    amortized.
+    """
+
+    def __init__(self, capacity=64):
+        """
+        Initialize an empty table.
+
+        Args:
+            capacity (int): Maximum number of values to track.
+
+        Raises:
+            ValueError: If the capacity is not positive.
+        """
+        if capacity < 1:
+            raise ValueError("The capacity must be at least one value.")
+        self.capacity = capacity
+        self.counters = {}
+        self.total = 0
+        self._heap = []
+        self._sequence = 0
+
+    def _entry(self, count, number):
+        """Return a heap entry; the sequence number breaks count ties."""
+        self._sequence += 1
+        return (count, self._sequence, number)
+
+    def _rebuild_heap(self):
+        """Rebuild the eviction heap from the counters."""
+        self._heap = [self._entry(count, number)
+                      for number, (count, _) in self.counters.items()]
+        heapq.heapify(self._heap)
+
+    def _evict(self):
+        """Remove the value with the smallest count and return the count."""
+        heap = self._heap
+        while True:
+            count, _, number = heap[0]
+            actual = self.counters[number][0]
+            if actual == count:
+                heapq.heappop(heap)
+                del self.counters[number]
+                return count
+            heapq.heapreplace(heap, self._entry(actual, number))
+
+    def update(self, number, weight=1):
+        """
+        Add a number to the table.
+
+        Args:
+            number (float): The number to add.
+            weight (int): How many times the number occurs.
+        """
+        self.total += weight
+        counter = self.counters.get(number)
+        if counter is not None:
+            counter[0] += weight
+            return
+        error = self._evict() if len(self.counters) >= self.capacity else 0
+        self.counters[number] = [error + weight, error]
+        heapq.heappush(self._heap, self._entry(error + weight, number))
+
+    def error_bound(self):
+        """Return the largest possible overestimate of any count."""
+        return self.total / self.capacity
+
+    def is_exact(self):
+        """
+        Tell whether every value seen is tracked with its exact count.
+
+        This holds until more than ``capacity`` distinct values are
+        seen, either directly or through a merge.
+        """
+        return (all(error == 0 for _, error in self.counters.values())
+                and sum(count for count, _ in self.counters.values())
+                == self.total)
+
+    def merge(self, other):
+        """
+        Merge another table into this one.
+
+        Counts of shared values are added, and only the ``capacity``
+        largest counts are kept.
+
+        Args:
+            other (SpaceSaving): The table to merge.
+
+        Returns:
+            SpaceSaving: The table itself.
+        """
+        self.total += other.total
+        for number, (count, error) in other.counters.items():
+            counter = self.counters.setdefault(number, [0, 0])
+            counter[0] += count
+            counter[1] += error
+        if len(self.counters) > self.capacity:
+            kept = sorted(self.counters.items(),
+                          key=lambda item: -item[1][0])[:self.capacity]
+            self.counters = dict(kept)
+        self._rebuild_heap()
+        return self
+
+    def most_common(self, limit=None):
+        """
+        Return the tracked values by decreasing count.
+
+        Args:
+            limit (int): Maximum number of values to return.
+
+        Returns:
+            list: Tuples of (value, count, error).
+        """
+        items = sorted(self.counters.items(), key=lambda item: -item[1][0])
+        return [(number, count, error)
+                for number, (count, error) in items[:limit]]
+
+    def to_dict(self):
+        """Return the table as a JSON-serializable dictionary."""
+        return {"capacity": self.capacity,
+                "total": self.total,
+                "counters": [[number, count, error]
+                             for number, (count, error)
+                             in self.counters.items()]}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create a table from a dictionary made by to_dict."""
+        table = cls(data["capacity"])
+        table.counters = {number: [count, error]
+                          for number, count, error in data["counters"]}
+        table.total = data.get("total", sum(
+            count for count, _ in table.counters.values()))
+        table._rebuild_heap()
+        return table
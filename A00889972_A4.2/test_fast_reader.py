@@ -0,0 +1,94 @@
+"""
+Unit tests for the fast_reader ingestion layer.
+
+Author: Najk
+Date: 01-02-2024.
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from collections import Counter
+
+import fast_reader
+
+TEXT = ("alpha beta\tgamma\n"
+        "a-very-long-token-without-any-break delta\n"
+        "\n"
+        "epsilon\x0bzeta\x0ceta  theta\r\n"
+        "ñandú iota")
+
+
+class TestFastReader(unittest.TestCase):
+    """Test class for the block and range splitting."""
+
+    def setUp(self):
+        """Write the sample text to a temporary file."""
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, "words.txt")
+        self.data = TEXT.encode('utf-8')
+        with open(self.path, 'wb') as file:
+            file.write(self.data)
+
+    def tearDown(self):
+        """Remove the temporary file."""
+        self.folder.cleanup()
+
+    def test_blocks_never_split_tokens(self):
+        """Test blocks cover the file and end on whitespace."""
+        for block_size in (1, 2, 5, 16, 1 << 20):
+            blocks = list(fast_reader.iter_blocks(self.path, block_size))
+            self.assertEqual(b"".join(blocks), self.data)
+            for block in blocks[:-1]:
+                self.assertIn(block[-1:], fast_reader.WHITESPACE)
+            words = [word for chunk in fast_reader.iter_word_chunks(
+                self.path, block_size) for word in chunk]
+            self.assertEqual(words, TEXT.split())
+
+    def test_blocks_of_a_range(self):
+        """Test the offset and stop of iter_blocks."""
+        start = self.data.index(b"delta")
+        stop = self.data.index(b"\n\n") + 1
+        blocks = fast_reader.iter_blocks(self.path, 4, start, stop)
+        self.assertEqual(b"".join(blocks), b"delta\n")
+
+    def test_split_ranges(self):
+        """Test ranges are contiguous and only start after whitespace."""
+        for parts in (1, 2, 3, 7, 100):
+            ranges = fast_reader.split_ranges(self.path, parts)
+            self.assertLessEqual(len(ranges), parts)
+            self.assertEqual(ranges[0][0], 0)
+            self.assertEqual(ranges[-1][1], len(self.data))
+            for (_, stop), (start, _) in zip(ranges, ranges[1:]):
+                self.assertEqual(stop, start)
+                self.assertIn(self.data[start - 1:start],
+                              fast_reader.WHITESPACE)
+            counts = [fast_reader.count_words(self.path, offset=start,
+                                              stop=stop)
+                      for start, stop in ranges]
+            self.assertEqual(sum(counts, Counter()),
+                             fast_reader.count_words(self.path))
+
+    def test_split_empty_file(self):
+        """Test an empty file has no ranges."""
+        open(self.path, 'wb').close()
+        self.assertEqual(fast_reader.split_ranges(self.path, 4), [])
+
+    def test_invalid_numbers(self):
+        """Test invalid tokens are skipped and reported once."""
+        with open(self.path, 'w', encoding='utf-8') as file:
+            file.write("1 2.5 x\n-3 1e2 y\n")
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            chunks = list(fast_reader.iter_number_chunks(self.path,
+                                                         block_size=4))
+        numbers = [number for chunk in chunks for number in chunk]
+        self.assertEqual(numbers, [1, 2.5, -3, 100])
+        self.assertIs(type(numbers[-1]), int)
+        self.assertIn("2 token(s) skipped", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
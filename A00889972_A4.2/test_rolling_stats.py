@@ -0,0 +1,66 @@
+"""
+Unit tests for the RollingStatistics class.
+
+Author: Najk
+Date: 01-02-2024.
+"""
+
+import os
+import random
+import unittest
+
+import compute_statistics
+from rolling_stats import RollingStatistics
+
+
+class TestRollingStatistics(unittest.TestCase):
+    """Test class for RollingStatistics against the compute_* functions."""
+
+    def check_windows(self, numbers, window):
+        """Compare every full window with a recomputation."""
+        stats = RollingStatistics(window)
+        for end, number in enumerate(numbers, 1):
+            stats.update(number)
+            values = numbers[max(0, end - window):end]
+            mean = compute_statistics.compute_mean(values)
+            variance = compute_statistics.compute_variance(values, mean)
+            self.assertEqual(stats.count, len(values))
+            self.assertAlmostEqual(stats.mean(), mean,
+                                   delta=1e-12 * max(1.0, abs(mean)))
+            self.assertAlmostEqual(stats.variance(), variance,
+                                   delta=1e-9 * max(1.0, variance))
+            self.assertEqual(stats.median(),
+                             compute_statistics.compute_median(values))
+            self.assertEqual(stats.mode(),
+                             compute_statistics.compute_mode(values))
+
+    def test_course_file(self):
+        """Test every window of a course file."""
+        numbers = compute_statistics.read_file(
+            os.path.join(os.path.dirname(__file__), "P1", "TC1.txt"))
+        for window in (1, 2, 4, 17):
+            self.check_windows(numbers, window)
+
+    def test_large_value_leaves_window(self):
+        """Test the moments after a dominant value drops out."""
+        self.check_windows([1e20, 1, 2, 3], 2)
+        self.check_windows([3.5e20, 359, 365, 189, 76, 7.25], 4)
+
+    def test_mixed_numbers(self):
+        """Test a random stream of ints and floats with repeats."""
+        generator = random.Random(7)
+        numbers = [generator.choice((generator.randint(-5, 5),
+                                     generator.uniform(-1e6, 1e6),
+                                     generator.uniform(-1e15, 1e15)))
+                   for _ in range(400)]
+        for window in (3, 10):
+            self.check_windows(numbers, window)
+
+    def test_window_must_be_positive(self):
+        """Test an empty window is rejected."""
+        with self.assertRaises(ValueError):
+            RollingStatistics(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Unit tests for the TDigest and SpaceSaving summaries.
+
+Author: Najk
+Date: 01-02-2024.
+"""
+
+import random
+import unittest
+from collections import Counter
+
+from sketches import SpaceSaving, TDigest
+
+
+class TestSpaceSaving(unittest.TestCase):
+    """Test class for SpaceSaving."""
+
+    def stream(self, distinct, length, seed=0):
+        """Return a skewed stream of values."""
+        generator = random.Random(seed)
+        return [int(generator.paretovariate(1.2)) % distinct
+                for _ in range(length)]
+
+    def test_exact_under_capacity(self):
+        """Test counts are exact while the values fit in the table."""
+        values = self.stream(10, 500)
+        table = SpaceSaving(10)
+        for value in values:
+            table.update(value)
+        self.assertTrue(table.is_exact())
+        self.assertEqual({value: count for value, count, _
+                          in table.most_common()}, Counter(values))
+
+    def test_bounds_over_capacity(self):
+        """Test counts overestimate by at most their error and the bound."""
+        values = self.stream(200, 5000)
+        table = SpaceSaving(16)
+        for value in values:
+            table.update(value)
+        self.assertFalse(table.is_exact())
+        truth = Counter(values)
+        for value, count, error in table.most_common():
+            self.assertGreaterEqual(count, truth[value])
+            self.assertLessEqual(count - error, truth[value])
+            self.assertLessEqual(count - truth[value], table.error_bound())
+
+    def test_merge(self):
+        """Test a merge stays exact only while the union fits."""
+        left, right = SpaceSaving(8), SpaceSaving(8)
+        for value in (1, 2, 2, 3):
+            left.update(value)
+        for value in (2, 3, 4):
+            right.update(value)
+        left.merge(right)
+        self.assertTrue(left.is_exact())
+        self.assertEqual(left.total, 7)
+        self.assertEqual(left.most_common(1), [(2, 3, 0)])
+        other = SpaceSaving(8)
+        for value in range(10, 15):
+            other.update(value)
+        left.merge(other)
+        self.assertEqual(len(left.counters), 8)
+        self.assertFalse(left.is_exact())
+
+    def test_round_trip(self):
+        """Test a table saved with to_dict keeps its counts."""
+        table = SpaceSaving(4)
+        for value in self.stream(20, 300):
+            table.update(value)
+        copy = SpaceSaving.from_dict(table.to_dict())
+        self.assertEqual(copy.most_common(), table.most_common())
+        self.assertEqual(copy.is_exact(), table.is_exact())
+
+
+class TestTDigest(unittest.TestCase):
+    """Test class for TDigest."""
+
+    def check_quantiles(self, digest, values):
+        """Compare the estimates with the ranks of the sorted values."""
+        values = sorted(values)
+        self.assertEqual(digest.quantile(0), values[0])
+        self.assertEqual(digest.quantile(1), values[-1])
+        previous = values[0]
+        for step in range(1, 100):
+            quantile = step / 100
+            estimate = digest.quantile(quantile)
+            self.assertGreaterEqual(estimate, previous)
+            self.assertLessEqual(estimate, values[-1])
+            rank = sum(1 for value in values if value <= estimate)
+            self.assertAlmostEqual(rank / len(values), quantile, delta=0.02)
+            previous = estimate
+
+    def test_quantile_bounds(self):
+        """Test estimates stay within the data and near their rank."""
+        generator = random.Random(3)
+        values = [generator.gauss(0, 1) ** 3 for _ in range(5000)]
+        digest = TDigest()
+        for value in values:
+            digest.update(value)
+        self.check_quantiles(digest, values)
+
+    def test_merge(self):
+        """Test merged digests estimate the quantiles of the union."""
+        generator = random.Random(5)
+        values = [generator.expovariate(1) for _ in range(4000)]
+        left, right = TDigest(), TDigest()
+        for value in values[:1500]:
+            left.update(value)
+        for value in values[1500:]:
+            right.update(value)
+        left.merge(right)
+        self.assertEqual(left.count, len(values))
+        self.check_quantiles(left, values)
+
+    def test_small_digests(self):
+        """Test empty and single-value digests."""
+        digest = TDigest()
+        self.assertIsNone(digest.quantile(0.5))
+        digest.update(7)
+        self.assertEqual(digest.quantile(0.5), 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
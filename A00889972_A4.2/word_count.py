@@ -5,14 +5,24 @@ This script reads words from a file, identifies all distinct words, and
 calculates the frequency of each word. The results are printed on the
 screen and saved in a file named WordCountResults.txt.
 
-Usage: python word_count.py fileWithData.txt
+Usage: python word_count.py fileWithData.txt [--workers N]
+       python word_count.py fileWithData.txt --top K [--approximate]
+       python word_count.py fileWithData.txt --index index.db [--top K]
+       python word_count.py fileWithData.txt --ngram N [--min-count M]
+                            [--top K]
 
 Author: Najk
 Date: 01-02-2024.
 """
 
-import sys
+import argparse
 import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import fast_reader
+from sketches import SpaceSaving
+from word_index import WordIndex
 
 
 def read_file(file_name):
@@ -26,13 +36,8 @@ def read_file(file_name):
         list: A list of words read from the file.
     """
     words = []
-    try:
-        with open(file_name, 'r', encoding='utf-8') as file:
-            for line in file:
-                for word in line.split():
-                    words.append(word)
-    except FileNotFoundError:
-        print("File not found.")
+    for chunk in fast_reader.iter_word_chunks(file_name):
+        words.extend(chunk)
     return words
 
 
@@ -47,47 +52,480 @@ def count_words(words):
         dict: A dictionary where keys are words
         and values are their frequencies.
     """
-    word_count = {}
-    for word in words:
-        word_count[word] = word_count.get(word, 0) + 1
-    return word_count
+    return Counter(words)
 
 
-def process_file(file_name):
+def count_file_words(file_name):
     """
-    Process a file to count the frequency of distinct words.
+    Count the frequency of each word in a file as a stream.
+
+    Memory grows with the number of distinct words rather than the size
+    of the file; see fast_reader.count_words.
 
     Args:
-        file_name (str): The name of the file to process.
+        file_name (str): The name of the file to read.
+
+    Returns:
+        Counter: The frequency of each word, in order of first
+        appearance.
+    """
+    return fast_reader.count_words(file_name)
+
+
+class NgramCounter:
+    """
+    Frequency of word n-grams over a stream of words.
+
+    Every word is interned to an integer ID in order of first
+    appearance, and the IDs of an n-gram are packed into a single
+    integer of ID_BITS bits per word, so the table holds one small int
+    per distinct n-gram instead of a tuple of strings. N-grams span
+    chunk boundaries.
+
+    Words can be excluded up front: any n-gram containing one of them
+    is skipped while counting. Since an n-gram never occurs more often
+    than its rarest word, excluding the words below a minimum count
+    prunes the table without changing the n-grams that reach it.
+
+    With a ``capacity`` the n-grams go through a Space-Saving table
+    instead of an exact count, bounding memory for top-K queries.
+    """
+
+    ID_BITS = 32
+
+    def __init__(self, n=2, capacity=None, excluded=None):
+        """
+        Initialize an empty count.
+
+        Args:
+            n (int): Number of words per n-gram.
+            capacity (int): Track at most this many n-grams
+            approximately; count all of them exactly if None.
+            excluded (set): Words whose n-grams are not counted.
+
+        Raises:
+            ValueError: If n is not positive.
+        """
+        if n < 1:
+            raise ValueError("An n-gram holds at least one word.")
+        self.n = n
+        self.words = []
+        self._ids = {}
+        self._tail = []
+        self.table = SpaceSaving(capacity) if capacity else None
+        self.counts = Counter()
+        for word in excluded or ():
+            self._ids[word] = -1
+
+    def _intern(self, word):
+        """Return the ID of a word, assigning a new one if needed."""
+        word_id = self._ids.get(word)
+        if word_id is None:
+            word_id = self._ids[word] = len(self.words)
+            self.words.append(word)
+        return word_id
+
+    def update(self, words):
+        """
+        Count the n-grams ending in a chunk of words.
+
+        Args:
+            words (list): The next words of the stream.
+        """
+        intern = self._intern
+        ids = self._tail + [intern(word) for word in words]
+        start = max(len(ids) - self.n + 1, 0)
+        keys = ids[:start]
+        for offset in range(1, self.n):
+            # An excluded word (-1) makes the packed key negative.
+            keys = [(key << self.ID_BITS) | word_id
+                    for key, word_id in zip(keys, ids[offset:])]
+        self._tail = ids[start:] if self.n > 1 else []
+        keys = [key for key in keys if key >= 0]
+        if self.table is None:
+            self.counts.update(keys)
+        else:
+            update = self.table.update
+            for key in keys:
+                update(key)
+
+    def decode(self, key):
+        """
+        Return the words of a packed n-gram.
+
+        Args:
+            key (int): The packed n-gram.
+
+        Returns:
+            str: The words separated by spaces.
+        """
+        mask = (1 << self.ID_BITS) - 1
+        words = []
+        for _ in range(self.n):
+            words.append(self.words[key & mask])
+            key >>= self.ID_BITS
+        return " ".join(reversed(words))
+
+    def most_common(self, top=None, min_count=1):
+        """
+        Return the most frequent n-grams.
+
+        Args:
+            top (int): Maximum number of n-grams to return.
+            min_count (int): Leave out n-grams seen fewer times.
+
+        Returns:
+            list: (n-gram, count, error) tuples by descending count;
+            the error is 0 for exact counts.
+        """
+        if self.table is None:
+            items = ((key, count, 0)
+                     for key, count in self.counts.most_common(top))
+        else:
+            items = self.table.most_common(top)
+        return [(self.decode(key), count, error)
+                for key, count, error in items if count >= min_count]
+
+    def items(self, min_count=1):
+        """
+        Return the exact n-gram counts in order of first appearance.
+
+        Args:
+            min_count (int): Leave out n-grams seen fewer times.
+
+        Returns:
+            list: (n-gram, count) tuples.
+        """
+        return [(self.decode(key), count)
+                for key, count in self.counts.items() if count >= min_count]
+
+
+def count_ngrams(words, n=2):
+    """
+    Count the frequency of each n-gram in a list of words.
+
+    Args:
+        words (list): A list of words.
+        n (int): Number of words per n-gram.
+
+    Returns:
+        dict: The frequency of each n-gram, keyed by its words
+        separated by spaces.
+    """
+    counter = NgramCounter(n)
+    counter.update(words)
+    return dict(counter.items())
+
+
+def count_file_ngrams(file_name, n=2, min_count=1, capacity=None):
+    """
+    Count the n-grams of a file as a stream.
+
+    With a minimum count above one and n above one, the file is read
+    twice: its words are counted first, and the n-grams containing a
+    word below the minimum are skipped during the second pass. Pruning
+    in a single pass would mean holding every n-gram until the end,
+    and the rare n-grams this keeps out of memory make up most of the
+    table.
+
+    Args:
+        file_name (str): The name of the file to read.
+        n (int): Number of words per n-gram.
+        min_count (int): Minimum count of the n-grams to be reported.
+        capacity (int): Track at most this many n-grams approximately.
+
+    Returns:
+        NgramCounter: The counted n-grams.
+    """
+    excluded = None
+    if n > 1 and min_count > 1:
+        excluded = {word for word, count in count_file_words(file_name).items()
+                    if count < min_count}
+    counter = NgramCounter(n, capacity, excluded)
+    for chunk in fast_reader.iter_word_chunks(file_name):
+        counter.update(chunk)
+    return counter
+
+
+def count_range(byte_range):
+    """
+    Count the words of one byte range of a file.
+
+    Args:
+        byte_range (tuple): The file name and the start and stop
+        offsets of the range.
+
+    Returns:
+        Counter: The frequency of each word in the range.
+    """
+    file_name, start, stop = byte_range
+    return fast_reader.count_words(file_name, offset=start, stop=stop)
+
+
+def reduce_counters(counters):
+    """
+    Merge the counters of consecutive ranges in the parent process.
+
+    Every counter is added to the first one in range order, so the
+    words keep the order of their first appearance in the file, and
+    each counter crosses a process boundary only once, when its worker
+    returns it.
+
+    Args:
+        counters (iterable): The counters of consecutive ranges; merged
+        as they arrive when it is the result of Executor.map.
+
+    Returns:
+        Counter: The merged counter.
     """
-    words = read_file(file_name)
-    word_count = count_words(words)
+    counters = iter(counters)
+    merged = next(counters, None)
+    if merged is None:
+        return Counter()
+    for counter in counters:
+        merged.update(counter)
+    return merged
+
+
+def count_file_words_parallel(file_name, workers):
+    """
+    Count the frequency of each word in a file with several processes.
+
+    The file is split into byte ranges that end on whitespace; each
+    worker memory-maps the file and counts its own range, and the
+    parent merges the partial counts in range order as they arrive.
+    The result equals count_file_words, including the order of the
+    words.
+
+    Args:
+        file_name (str): The name of the file to read.
+        workers (int): Number of worker processes.
+
+    Returns:
+        Counter: The frequency of each word.
+    """
+    if workers <= 1:
+        return count_file_words(file_name)
+    try:
+        ranges = fast_reader.split_ranges(file_name, workers)
+    except FileNotFoundError:
+        print("File not found.")
+        return Counter()
+    if len(ranges) <= 1:
+        return count_file_words(file_name)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return reduce_counters(executor.map(
+            count_range, [(file_name, start, stop) for start, stop in ranges]))
+
+
+def top_words(word_count, top):
+    """
+    Return the most frequent words of a count.
+
+    Args:
+        word_count (Counter): The frequency of each word.
+        top (int): How many words to return.
+
+    Returns:
+        list: (word, count) tuples by descending frequency; ties keep
+        the order of first appearance.
+    """
+    return word_count.most_common(top)
+
+
+def approximate_top_words(file_name, top, capacity=None):
+    """
+    Estimate the most frequent words of a file in bounded memory.
+
+    Words are streamed through a Space-Saving table, so memory is
+    O(capacity) whatever the vocabulary size. Every word occurring
+    more than total / capacity times is guaranteed to be tracked.
+
+    Args:
+        file_name (str): The name of the file to read.
+        top (int): How many words to return.
+        capacity (int): Words tracked by the table; 10 * top by default.
+
+    Returns:
+        tuple: (word, count, error) tuples by descending estimated
+        count, and the table, whose error_bound() caps every error.
+    """
+    table = SpaceSaving(capacity or 10 * top)
+    update = table.update
+    for chunk in fast_reader.iter_word_chunks(file_name):
+        for word in chunk:
+            update(word)
+    return table.most_common(top), table
+
+
+def write_results(file_name, rows, footer=None):
+    """
+    Print the results and save them to WordCountResults.txt.
+
+    Args:
+        file_name (str): The name of the processed file.
+        rows (iterable): Formatted result rows.
+        footer (str): An optional last line.
+    """
+    rows = list(rows)
+    if footer:
+        rows.append(footer)
 
     with open("WordCountResults.txt", 'w', encoding='utf-8') as result_file:
         result_file.write("Word Count Results:\n")
         result_file.write("Row Labels\tCount of "+file_name.strip('.txt')+"\n")
-        for word, count in word_count.items():
-            result_file.write(f"{word}\t\t{count}\n")
+        for row in rows:
+            result_file.write(row + "\n")
 
     print("Word Count Results:")
     print("Row Labels\tCount of FileName")
-    for word, count in word_count.items():
-        print(f"{word}\t\t{count}")
+    for row in rows:
+        print(row)
+
+
+def process_indexed_file(file_name, index_path, top=None):
+    """
+    Report the word counts of a file from a persistent index.
+
+    The file is only counted again when its content changed since it
+    was indexed.
+
+    Args:
+        file_name (str): The name of the file to process.
+        index_path (str): The path to the index database.
+        top (int): Only report the ``top`` most frequent words.
+    """
+    with WordIndex(index_path) as index:
+        counted, _ = index.update([file_name])
+        print(f"Index {'updated' if counted else 'up to date'}: "
+              f"{index_path}")
+        items = index.file_counts(file_name, top)
+    write_results(file_name, (f"{word}\t\t{count}" for word, count in items))
+
+
+def process_ngrams(file_name, n, top=None, min_count=1, approximate=False,
+                   capacity=None):
+    """
+    Process a file to count the frequency of its word n-grams.
+
+    Args:
+        file_name (str): The name of the file to process.
+        n (int): Number of words per n-gram.
+        top (int): Only report the ``top`` most frequent n-grams.
+        min_count (int): Only report n-grams seen at least this often.
+        approximate (bool): Estimate the top n-grams in bounded memory.
+        capacity (int): N-grams tracked in approximate mode.
+
+    Raises:
+        ValueError: If approximate mode is requested without a top.
+    """
+    if approximate and not top:
+        raise ValueError("Approximate mode needs a top count.")
+    if approximate:
+        capacity = capacity or 10 * top
+    else:
+        capacity = None
+    counter = count_file_ngrams(file_name, n, min_count, capacity)
+    if approximate:
+        write_results(
+            file_name,
+            (f"{ngram}\t\t{count}\t(+/-{error})"
+             for ngram, count, error in counter.most_common(top, min_count)),
+            f"Approximate counts over {counter.table.total} n-grams; each "
+            f"count overestimates by at most "
+            f"{counter.table.error_bound():g}")
+    elif top:
+        write_results(file_name,
+                      (f"{ngram}\t\t{count}" for ngram, count, _
+                       in counter.most_common(top, min_count)))
+    else:
+        write_results(file_name,
+                      (f"{ngram}\t\t{count}"
+                       for ngram, count in counter.items(min_count)))
+
+
+def process_file(file_name, workers=1, top=None, approximate=False,
+                 capacity=None):
+    """
+    Process a file to count the frequency of distinct words.
+
+    Args:
+        file_name (str): The name of the file to process.
+        workers (int): Number of worker processes.
+        top (int): Only report the ``top`` most frequent words, by
+        descending frequency.
+        approximate (bool): Estimate the top words in bounded memory.
+        capacity (int): Words tracked in approximate mode.
+
+    Raises:
+        ValueError: If approximate mode is requested without a top.
+    """
+    if approximate:
+        if not top:
+            raise ValueError("Approximate mode needs a top count.")
+        estimates, table = approximate_top_words(file_name, top, capacity)
+        write_results(
+            file_name,
+            (f"{word}\t\t{count}\t(+/-{error})"
+             for word, count, error in estimates),
+            f"Approximate counts over {table.total} words; each count "
+            f"overestimates by at most {table.error_bound():g}")
+        return
+
+    word_count = count_file_words_parallel(file_name, workers)
+    if top:
+        items = top_words(word_count, top)
+    else:
+        items = word_count.items()
+    write_results(file_name, (f"{word}\t\t{count}" for word, count in items))
 
 
 def main():
     """
     Main function to execute the script.
     """
-    if len(sys.argv) != 2:
-        print("Usage: python wordCount.py fileWithData.txt")
-        return
+    parser = argparse.ArgumentParser(
+        usage="python word_count.py fileWithData.txt")
+    parser.add_argument("file_name")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes counting byte ranges")
+    parser.add_argument("--top", type=int, default=None,
+                        help="only report the K most frequent words")
+    parser.add_argument("--approximate", action="store_true",
+                        help="estimate the top words in bounded memory")
+    parser.add_argument("--capacity", type=int, default=None,
+                        help="words tracked in approximate mode")
+    parser.add_argument("--index", default=None,
+                        help="persistent index to update and report from")
+    parser.add_argument("--ngram", type=int, default=1,
+                        help="count sequences of N words")
+    parser.add_argument("--min-count", type=int, default=1,
+                        help="only report n-grams seen at least M times")
+    args = parser.parse_args()
 
-    file_name = sys.argv[1]
+    file_name = args.file_name
 
     start_time = time.time()
 
-    process_file(file_name)
+    if args.approximate and not args.top:
+        parser.error("--approximate requires --top")
+
+    if args.ngram < 1:
+        parser.error("--ngram must be at least 1")
+
+    if (args.ngram > 1 or args.min_count > 1) and (
+            args.workers != 1 or args.index):
+        parser.error("--ngram and --min-count cannot be combined with "
+                     "--workers or --index")
+
+    if args.ngram > 1 or args.min_count > 1:
+        process_ngrams(file_name, args.ngram, args.top, args.min_count,
+                       args.approximate, args.capacity)
+    elif args.index:
+        process_indexed_file(file_name, args.index, args.top)
+    else:
+        process_file(file_name, args.workers, args.top, args.approximate,
+                     args.capacity)
 
     end_time = time.time()
     elapsed_time = end_time - start_time
@@ -0,0 +1,318 @@
+"""
+
+Persistent word frequency index over a set of files.
+
+The index is a SQLite database holding the word counts of every file
+together with its size, modification time and content hash, plus a
+running total per word. Updating the index only recounts files whose
+content changed, and point lookups, prefix queries and top-N queries
+are answered from the database without reading the source text.
+
+Usage: python word_index.py index.db update file1.txt [file2.txt ...]
+       python word_index.py index.db lookup word
+       python word_index.py index.db prefix prefix [--limit N]
+       python word_index.py index.db top N
+
+Author: Najk
+Date: 01-02-2024.
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+
+import fast_reader
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counts (
+    word TEXT NOT NULL,
+    file_id INTEGER NOT NULL REFERENCES files (id),
+    count INTEGER NOT NULL,
+    PRIMARY KEY (word, file_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS counts_by_file ON counts (file_id);
+CREATE TABLE IF NOT EXISTS totals (
+    word TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS totals_by_count ON totals (count DESC);
+"""
+
+
+class WordIndex:
+    """
+    On-disk index of word frequencies per file.
+    """
+
+    def __init__(self, index_path):
+        """
+        Open an index, creating it if needed.
+
+        Args:
+            index_path (str): The path to the SQLite database.
+        """
+        self.connection = sqlite3.connect(index_path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        """Close the database."""
+        self.connection.close()
+
+    def __enter__(self):
+        """Use the index as a context manager."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close the index when leaving the context."""
+        self.close()
+
+    def _remove_counts(self, file_id):
+        """Subtract a file's counts from the totals and delete them."""
+        cursor = self.connection.cursor()
+        cursor.execute(
+            "UPDATE totals SET count = count - ("
+            " SELECT count FROM counts"
+            " WHERE counts.word = totals.word AND counts.file_id = ?)"
+            " WHERE word IN (SELECT word FROM counts WHERE file_id = ?)",
+            (file_id, file_id))
+        cursor.execute("DELETE FROM totals WHERE count <= 0")
+        cursor.execute("DELETE FROM counts WHERE file_id = ?", (file_id,))
+
+    def _add_counts(self, file_id, word_count):
+        """Store a file's counts and add them to the totals."""
+        cursor = self.connection.cursor()
+        cursor.executemany(
+            "INSERT INTO counts (word, file_id, count) VALUES (?, ?, ?)",
+            ((word, file_id, count) for word, count in word_count.items()))
+        cursor.executemany(
+            "INSERT INTO totals (word, count) VALUES (?, ?)"
+            " ON CONFLICT (word) DO UPDATE SET count = count + excluded.count",
+            word_count.items())
+
+    def update_file(self, file_name):
+        """
+        Bring the counts of one file up to date.
+
+        Files whose size and modification time are unchanged are
+        skipped; otherwise the content hash decides whether the file
+        has to be counted again.
+
+        Args:
+            file_name (str): The name of the file.
+
+        Returns:
+            bool: True if the file was counted.
+        """
+        path = os.path.abspath(file_name)
+        file_stat = os.stat(path)
+        row = self.connection.execute(
+            "SELECT id, size, mtime_ns, digest FROM files WHERE path = ?",
+            (path,)).fetchone()
+        if (row and row[1] == file_stat.st_size
+                and row[2] == file_stat.st_mtime_ns):
+            return False
+
+        digest = fast_reader.file_digest(path)
+        with self.connection:
+            if row and row[3] == digest:
+                self.connection.execute(
+                    "UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?",
+                    (file_stat.st_size, file_stat.st_mtime_ns, row[0]))
+                return False
+            if row:
+                file_id = row[0]
+                self._remove_counts(file_id)
+                self.connection.execute(
+                    "UPDATE files SET size = ?, mtime_ns = ?, digest = ?"
+                    " WHERE id = ?",
+                    (file_stat.st_size, file_stat.st_mtime_ns, digest,
+                     file_id))
+            else:
+                file_id = self.connection.execute(
+                    "INSERT INTO files (path, size, mtime_ns, digest)"
+                    " VALUES (?, ?, ?, ?)",
+                    (path, file_stat.st_size, file_stat.st_mtime_ns,
+                     digest)).lastrowid
+            self._add_counts(file_id, fast_reader.count_words(path))
+        return True
+
+    def remove_file(self, path):
+        """
+        Remove a file and its counts from the index.
+
+        Args:
+            path (str): The absolute path stored in the index.
+        """
+        row = self.connection.execute(
+            "SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return
+        with self.connection:
+            self._remove_counts(row[0])
+            self.connection.execute("DELETE FROM files WHERE id = ?", row)
+
+    def update(self, file_names):
+        """
+        Update the index with a set of files.
+
+        Indexed files that no longer exist are dropped.
+
+        Args:
+            file_names (iterable): The files to index.
+
+        Returns:
+            tuple: The number of files counted and skipped.
+        """
+        counted = skipped = 0
+        for file_name in file_names:
+            if not os.path.isfile(file_name):
+                print(f"File not found: {file_name}")
+                continue
+            if self.update_file(file_name):
+                counted += 1
+            else:
+                skipped += 1
+        for (path,) in self.connection.execute(
+                "SELECT path FROM files").fetchall():
+            if not os.path.exists(path):
+                self.remove_file(path)
+        return counted, skipped
+
+    def lookup(self, word):
+        """
+        Return how often a word appears across all indexed files.
+
+        Args:
+            word (str): The word to look up.
+
+        Returns:
+            int: The total count, 0 if the word is unknown.
+        """
+        row = self.connection.execute(
+            "SELECT count FROM totals WHERE word = ?", (word,)).fetchone()
+        return row[0] if row else 0
+
+    def lookup_files(self, word):
+        """
+        Return how often a word appears in each indexed file.
+
+        Args:
+            word (str): The word to look up.
+
+        Returns:
+            list: (path, count) tuples.
+        """
+        return self.connection.execute(
+            "SELECT files.path, counts.count FROM counts"
+            " JOIN files ON files.id = counts.file_id"
+            " WHERE counts.word = ? ORDER BY files.path", (word,)).fetchall()
+
+    def file_counts(self, file_name, limit=None):
+        """
+        Return the word counts of one indexed file.
+
+        Args:
+            file_name (str): The name of the file.
+            limit (int): Maximum number of words to return.
+
+        Returns:
+            list: (word, count) tuples by descending count.
+        """
+        query = ("SELECT counts.word, counts.count FROM counts"
+                 " JOIN files ON files.id = counts.file_id"
+                 " WHERE files.path = ? ORDER BY counts.count DESC,"
+                 " counts.word")
+        parameters = [os.path.abspath(file_name)]
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+        return self.connection.execute(query, parameters).fetchall()
+
+    def prefix(self, prefix, limit=None):
+        """
+        Return the words starting with a prefix and their total counts.
+
+        Args:
+            prefix (str): The prefix to search for.
+            limit (int): Maximum number of words to return.
+
+        Returns:
+            list: (word, count) tuples in word order.
+        """
+        query = "SELECT word, count FROM totals"
+        parameters = []
+        if prefix:
+            upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+            query += " WHERE word >= ? AND word < ?"
+            parameters += [prefix, upper]
+        query += " ORDER BY word"
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+        return self.connection.execute(query, parameters).fetchall()
+
+    def top(self, limit):
+        """
+        Return the most frequent words across all indexed files.
+
+        Args:
+            limit (int): How many words to return.
+
+        Returns:
+            list: (word, count) tuples by descending count.
+        """
+        return self.connection.execute(
+            "SELECT word, count FROM totals ORDER BY count DESC, word"
+            " LIMIT ?", (limit,)).fetchall()
+
+
+def main():
+    """
+    Main function to execute the script.
+    """
+    parser = argparse.ArgumentParser(
+        usage="python word_index.py index.db command ...")
+    parser.add_argument("index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    update_parser = commands.add_parser("update")
+    update_parser.add_argument("files", nargs="+")
+    lookup_parser = commands.add_parser("lookup")
+    lookup_parser.add_argument("word")
+    prefix_parser = commands.add_parser("prefix")
+    prefix_parser.add_argument("prefix")
+    prefix_parser.add_argument("--limit", type=int, default=None)
+    top_parser = commands.add_parser("top")
+    top_parser.add_argument("limit", type=int)
+    args = parser.parse_args()
+
+    start_time = time.time()
+
+    with WordIndex(args.index) as index:
+        if args.command == "update":
+            counted, skipped = index.update(args.files)
+            print(f"Files counted: {counted}, unchanged: {skipped}")
+        elif args.command == "lookup":
+            print(f"{args.word}\t\t{index.lookup(args.word)}")
+            for path, count in index.lookup_files(args.word):
+                print(f"  {path}\t{count}")
+        elif args.command == "prefix":
+            for word, count in index.prefix(args.prefix, args.limit):
+                print(f"{word}\t\t{count}")
+        else:
+            for word, count in index.top(args.limit):
+                print(f"{word}\t\t{count}")
+
+    elapsed_time = time.time() - start_time
+    print(f"Time elapsed: {elapsed_time} seconds")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,16 +4,86 @@ Compute Sales
 This script computes the total cost of sales
 based on a price catalogue and sales records.
 
+The sales file is read as a stream, one record at a time, either as a
+JSON array or as line-delimited JSON with one record per line.
+
+With --exact, prices are converted to integer cents once and the
+total is accumulated exactly with integers instead of floats.
+
+Several sales files can be priced against the same catalogue at once:
+the catalogue index is built once and the files are processed in
+parallel worker processes, which inherit the index when processes are
+forked instead of receiving a copy with every file.
+
+The titles and prices of the catalogue are compiled into a binary
+cache next to it on first use, and later runs read the cache instead
+of parsing the catalogue while the catalogue is unchanged.
+
+Products missing from the catalogue are collected into one report at
+the end. With --fuzzy, each missing name is first matched against the
+catalogue titles through a trigram index, and priced as the most
+similar title when the similarity reaches the threshold.
+
+With --incremental, the byte offset reached, the record count and the
+running total in cents of every sales file are saved in
+SalesCheckpoint.json, and the next run only prices the records
+appended since. Everything is recomputed when the catalogue changes or
+the data before the offset no longer matches.
+
+Totals, quantities and line counts can also be grouped by sale, date,
+product and product type in the same pass over the sales.
+
 Usage:
 python compute_sales.py Catalogue.json sales.json
+python compute_sales.py Catalogue.json sales.json --group-by sale,date
+python compute_sales.py Catalogue.json sales.json --exact
+python compute_sales.py Catalogue.json sales1.json sales2.json ...
+                        [--workers N]
+python compute_sales.py Catalogue.json sales.json --no-cache
+python compute_sales.py Catalogue.json sales.json --fuzzy [THRESHOLD]
+python compute_sales.py Catalogue.json sales.json --incremental
 
 Author: Najk
 Date: 01-02-2024.
 """
 
+import argparse
+import hashlib
+import io
 import json
+import multiprocessing
+import os
+import re
+import struct
 import sys
 import time
+from array import array
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from decimal import ROUND_HALF_UP, Decimal
+
+from fuzzy_match import DEFAULT_THRESHOLD, ProductMatcher, TrigramIndex
+
+DUPLICATE_POLICIES = ("first", "last", "error")
+GROUPINGS = {"sale": "SALE_ID", "date": "SALE_Date", "product": "Product",
+             "type": "type"}
+READ_SIZE = 1 << 16
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+SEPARATOR = re.compile(r'[ \t\n\r]*,[ \t\n\r]*')
+NUMBER_TAIL = re.compile(r'[-+.0-9eE]+')
+LITERALS = ("true", "false", "null", "NaN", "Infinity", "-Infinity")
+CACHE_SUFFIX = ".prices"
+CACHE_MAGIC = b"PRICES3" + (b"<" if sys.byteorder == "little" else b">")
+# Magic, catalogue size, catalogue mtime_ns, catalogue SHA-1, titles.
+CACHE_HEADER = struct.Struct("<8sQQ20sQ")
+# Kind of each cached price, so it comes back with its JSON type.
+PRICE_FLOAT, PRICE_INT, PRICE_NONE = range(3)
+CHECKPOINT_FILE = "SalesCheckpoint.json"
+
+# Catalogue and trigram indexes used by the worker processes of
+# compute_file_totals.
+_WORKER_INDEX = None
+_WORKER_TRIGRAMS = None
 
 
 def load_json_file(file_path):
@@ -35,66 +105,1288 @@ def load_json_file(file_path):
         return None
 
 
-def compute_total_cost(price_catalogue, sales_record):
+def _truncated(error):
+    """
+    Tell whether a JSON decoding error is caused by the end of the text.
+
+    Args:
+        error (json.JSONDecodeError): The error raised while decoding
+        the text read so far.
+
+    Returns:
+        bool: True if the text could still become valid JSON by
+        appending to it, as with a record that is still being written.
+    """
+    rest = error.doc[error.pos:].strip()
+    if not rest or error.msg.startswith("Unterminated string"):
+        return True
+    if error.msg.startswith("Invalid \\uXXXX escape"):
+        return len(rest) < 6
+    return (NUMBER_TAIL.fullmatch(rest) is not None
+            or any(literal.startswith(rest) for literal in LITERALS))
+
+
+def _check_end(file, buffer, position, read_size):
+    """
+    Check that only whitespace follows the closing bracket of an array.
+
+    Args:
+        file (file): The text file being read.
+        buffer (str): The text read so far.
+        position (int): The position just after the closing bracket.
+        read_size (int): Number of characters read at a time.
+
+    Raises:
+        json.JSONDecodeError: If anything else is left in the file.
+    """
+    while True:
+        position = WHITESPACE.match(buffer, position).end()
+        if position < len(buffer):
+            raise json.JSONDecodeError("Extra data", buffer, position)
+        buffer, position = file.read(read_size), 0
+        if not buffer:
+            return
+
+
+def _iter_array_elements(file, read_size, expected, track):
+    """
+    Yield the elements of a JSON array, optionally with byte offsets.
+
+    Args:
+        file (file): A text file positioned at the array, or right
+        after one of its elements when ``expected`` is "separator".
+        read_size (int): Number of characters read at a time.
+        expected (str): "[" at the start of the array, "separator"
+        when resuming after an element.
+        track (bool): Compute the UTF-8 byte offset, relative to the
+        starting position, just after each element.
+
+    Yields:
+        tuple: Each element and its end offset, None if not tracked.
+
+    Raises:
+        json.JSONDecodeError: If the text is not a JSON array, or if
+        anything but whitespace follows it.
+    """
+    decoder = json.JSONDecoder()
+    scan_once = decoder.scan_once
+    bulk = not track
+    # The text around the comma after the first element, e.g. "},\n {".
+    boundary = None
+    buffer = ""
+    position = 0
+    # Characters before buffer[mark] take mark_bytes bytes in UTF-8.
+    mark = mark_bytes = 0
+    eof = False
+    while True:
+        position = WHITESPACE.match(buffer, position).end()
+        refill = position == len(buffer) and not eof
+        char = buffer[position:position + 1]
+        if refill:
+            pass
+        elif expected == "[":
+            if char != "[":
+                raise json.JSONDecodeError("Expecting '['", buffer, position)
+            position += 1
+            expected = "first"
+        elif expected == "separator":
+            if char == "]":
+                _check_end(file, buffer, position + 1, read_size)
+                return
+            if char != ",":
+                raise json.JSONDecodeError(
+                    "Expecting ',' delimiter", buffer, position)
+            position += 1
+            expected = "value"
+        elif char == "]" and expected == "first":
+            _check_end(file, buffer, position + 1, read_size)
+            return
+        else:
+            # The text up to a comma decodes as an array only if that
+            # comma separates two elements, so the complete elements of
+            # a block are decoded in one call, cut at the last place
+            # that looks like the boundary after the first element.
+            if bulk and boundary:
+                bulk = False
+                cut = buffer.rfind(boundary, position)
+                elements = None
+                if cut >= position:
+                    cut += boundary.index(",")
+                    try:
+                        elements = json.loads(
+                            "[" + buffer[position:cut] + "]")
+                    except json.JSONDecodeError:
+                        pass
+                if elements is not None:
+                    for element in elements:
+                        yield element, None
+                    position = cut + 1
+                    expected = "value"
+                    continue
+            # Otherwise an element followed by a comma is complete, so
+            # the block is decoded element by element without the
+            # checks below; they only run on the last one of a block.
+            start = position
+            while True:
+                try:
+                    element, end = scan_once(buffer, position)
+                except (StopIteration, json.JSONDecodeError):
+                    break
+                comma = SEPARATOR.match(buffer, end)
+                if comma is None:
+                    break
+                if boundary is None:
+                    boundary = buffer[end - 1:comma.end() + 1]
+                offset = None
+                if track:
+                    mark_bytes += len(buffer[mark:end].encode('utf-8'))
+                    mark, offset = end, mark_bytes
+                yield element, offset
+                position = comma.end()
+                expected = "value"
+            if position != start:
+                continue
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                if eof or not _truncated(e):
+                    raise
+                end = len(buffer)
+            following = WHITESPACE.match(buffer, end).end()
+            # The element may continue in the next block.
+            refill = (not eof and buffer[following:following + 1]
+                      not in (",", "]"))
+            if not refill:
+                offset = None
+                if track:
+                    mark_bytes += len(buffer[mark:end].encode('utf-8'))
+                    mark, offset = end, mark_bytes
+                yield element, offset
+                position = end
+                expected = "separator"
+        if refill:
+            if track:
+                mark_bytes += len(buffer[mark:position].encode('utf-8'))
+                mark = 0
+            chunk = file.read(read_size)
+            buffer, position, eof = buffer[position:] + chunk, 0, not chunk
+            bulk = not track
+
+
+def iter_json_array(file, read_size=READ_SIZE):
+    """
+    Yield the elements of a top-level JSON array one at a time.
+
+    The file is read in blocks and the complete elements of each block
+    are decoded together, so memory is bounded by the block size and
+    the largest element rather than the size of the file.
+
+    Args:
+        file (file): A text file holding a JSON array.
+        read_size (int): Number of characters read at a time.
+
+    Yields:
+        object: The decoded elements, in order.
+
+    Raises:
+        json.JSONDecodeError: If the file is not a valid JSON array.
+    """
+    for element, _ in _iter_array_elements(file, read_size, "[", False):
+        yield element
+
+
+def iter_json_lines(file):
+    """
+    Yield the records of a line-delimited JSON file.
+
+    Args:
+        file (file): A text file with one JSON value per line.
+
+    Yields:
+        object: The decoded records; blank lines are skipped.
+
+    Raises:
+        json.JSONDecodeError: If a line is not valid JSON.
+    """
+    for line in file:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def sales_format(file_path):
+    """
+    Detect the format of a sales file.
+
+    Args:
+        file_path (str): The path to the sales file.
+
+    Returns:
+        str: "array" if the first non-blank character is '[', "lines"
+        for line-delimited JSON, or None for an empty file.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(READ_SIZE), b""):
+            head = block.lstrip()
+            if head:
+                return "array" if head.startswith(b"[") else "lines"
+    return None
+
+
+def iter_sales(file_path):
+    """
+    Yield the sale records of a file as a stream.
+
+    A file whose first character is '[' is read as a JSON array, any
+    other file as line-delimited JSON.
+
+    Args:
+        file_path (str): The path to the sales file.
+
+    Yields:
+        dict: The sale records, in order.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        json.JSONDecodeError: If the file is not valid JSON.
+    """
+    file_format = sales_format(file_path)
+    if file_format is None:
+        return
+    with open(file_path, 'r', encoding='utf-8') as file:
+        if file_format == "array":
+            yield from iter_json_array(file)
+        else:
+            yield from iter_json_lines(file)
+
+
+def iter_sales_from(file_path, offset=0, file_format=None):
+    """
+    Yield the complete sale records after a byte offset.
+
+    Each record comes with the byte offset just after it, which is
+    where a later call resumes. A trailing record that is still being
+    written is left for that later call.
+
+    Args:
+        file_path (str): The path to the sales file.
+        offset (int): Where to start: 0, or an offset yielded before.
+        file_format (str): "array" or "lines"; detected if None.
+
+    Yields:
+        tuple: Each sale record and the offset after it.
+
+    Raises:
+        json.JSONDecodeError: If a complete record is not valid JSON.
+    """
+    file_format = file_format or sales_format(file_path)
+    if file_format is None:
+        return
+    with open(file_path, 'rb') as binary_file:
+        binary_file.seek(offset)
+        if file_format == "lines":
+            for line in binary_file:
+                text = line.strip()
+                if not text:
+                    offset += len(line)
+                    continue
+                try:
+                    record = json.loads(text)
+                except json.JSONDecodeError:
+                    if line.endswith(b"\n"):
+                        raise
+                    return
+                offset += len(line)
+                yield record, offset
+            return
+        # Without newline='' a CRLF file would be read with LF line
+        # ends and the byte offsets of its records would come out short.
+        file = io.TextIOWrapper(binary_file, encoding='utf-8', newline='')
+        elements = _iter_array_elements(
+            file, READ_SIZE, "separator" if offset else "[", True)
+        try:
+            for element, end in elements:
+                yield element, offset + end
+        except json.JSONDecodeError as e:
+            # An array is only closed once its last record is written.
+            if e.msg == "Extra data" or not _truncated(e):
+                raise
+
+
+def _build_index(price_catalogue, field, duplicates):
+    """Map each catalogue title to one field of its product."""
+    if duplicates not in DUPLICATE_POLICIES:
+        raise ValueError(f"Unknown duplicate policy: {duplicates}")
+    index = {}
+    for product in price_catalogue:
+        title = product['title']
+        if title in index:
+            if duplicates == "error":
+                raise ValueError(
+                    f"Product '{title}' appears more than once in the "
+                    "price catalogue.")
+            if duplicates == "first":
+                continue
+        index[title] = product.get(field)
+    return index
+
+
+def build_price_index(price_catalogue, duplicates="first"):
+    """
+    Build a title to price index of a catalogue.
+
+    Args:
+        price_catalogue (list): The catalogue of products.
+        duplicates (str): Which price a repeated title keeps: "first"
+        (the price the catalogue lists first), "last", or "error".
+
+    Returns:
+        dict: The price of each product title.
+
+    Raises:
+        ValueError: If the policy is unknown, or a title is repeated
+        under the "error" policy.
+    """
+    return _build_index(price_catalogue, 'price', duplicates)
+
+
+def build_type_index(price_catalogue, duplicates="first"):
+    """
+    Build a title to product type index of a catalogue.
+
+    Args:
+        price_catalogue (list): The catalogue of products.
+        duplicates (str): The policy for repeated titles, as in
+        build_price_index.
+
+    Returns:
+        dict: The type of each product title.
+    """
+    return _build_index(price_catalogue, 'type', duplicates)
+
+
+def price_to_cents(price):
+    """
+    Convert a price to integer cents.
+
+    The price is read through its shortest decimal representation, so
+    a catalogue price of 28.1 becomes exactly 2810 cents; fractions of
+    a cent are rounded half up.
+
+    Args:
+        price (float): The price.
+
+    Returns:
+        int: The price in cents.
+    """
+    return int(Decimal(repr(price)).scaleb(2).to_integral_value(
+        ROUND_HALF_UP))
+
+
+def format_cents(cents):
+    """
+    Format an amount of cents as a decimal string.
+
+    Args:
+        cents (int): The amount in cents.
+
+    Returns:
+        str: The amount with two decimals, e.g. "2481.86".
+    """
+    sign = "-" if cents < 0 else ""
+    units, remainder = divmod(abs(cents), 100)
+    return f"{sign}{units}.{remainder:02d}"
+
+
+def line_cents(quantity, item_cents):
+    """
+    Compute the cost in integer cents of one sale line.
+
+    Integer quantities are multiplied exactly. Other quantities, such
+    as 1.5 kg, are read through their shortest decimal representation
+    and the cost is rounded half up to a whole cent, so the total
+    stays an integer amount of cents.
+
+    Args:
+        quantity (int or float): The quantity sold.
+        item_cents (int): The price of the product in cents.
+
+    Returns:
+        int: The cost of the line in cents.
+    """
+    if isinstance(quantity, int):
+        return quantity * item_cents
+    return int((Decimal(repr(quantity)) * item_cents).to_integral_value(
+        ROUND_HALF_UP))
+
+
+def build_cents_index(price_catalogue, duplicates="first"):
+    """
+    Build a title to price in cents index of a catalogue.
+
+    Args:
+        price_catalogue (list or Mapping): The catalogue of products,
+        or a title to price index.
+        duplicates (str): The policy for repeated titles, as in
+        build_price_index.
+
+    Returns:
+        dict: The price in cents of each product title.
+    """
+    if isinstance(price_catalogue, Mapping):
+        price_index = price_catalogue
+    else:
+        price_index = build_price_index(price_catalogue, duplicates)
+    return {title: price_to_cents(price) for title, price
+            in price_index.items() if price is not None}
+
+
+def file_digest(file_path):
+    """
+    Return the SHA-1 hash of a file's content.
+
+    Args:
+        file_path (str): The path to the file.
+
+    Returns:
+        bytes: The digest.
+    """
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+class CompiledCatalogue(Mapping):
+    """
+    Read-only title to price index backed by a compiled cache.
+
+    Titles are kept as one UTF-8 blob sorted by bytes, with an array of
+    offsets, parallel arrays of prices and price kinds, and the order
+    of the titles in the catalogue, so loading the cache only copies
+    five buffers. Lookups use a binary search over the titles
+    and are memoized, since sales repeat the same products; once the
+    searches exceed a sixteenth of the titles, the whole index is
+    decoded into a dictionary instead.
+    """
+
+    def __init__(self, titles, offsets, prices, kinds, order):
+        """
+        Wrap the arrays of a compiled catalogue.
+
+        Args:
+            titles (bytes): The sorted UTF-8 titles, concatenated.
+            offsets (array): The start of each title in ``titles``,
+            plus the end of the last one.
+            prices (array): The price of each title as a double.
+            kinds (array): Whether each price is a float, an int or
+            missing (PRICE_FLOAT, PRICE_INT or PRICE_NONE).
+            order (array): The sorted position of each title, in
+            catalogue order.
+        """
+        self._titles = titles
+        self._offsets = offsets
+        self._prices = prices
+        self._kinds = kinds
+        self._order = order
+        self._memo = {}
+        self._searches = 0
+        self._complete = False
+
+    def _title(self, position):
+        """Return the encoded title at a position."""
+        offsets = self._offsets
+        return self._titles[offsets[position]:offsets[position + 1]]
+
+    def _find(self, title):
+        """Return the position of a title, or -1 if it is missing."""
+        key = title.encode('utf-8')
+        low, high = 0, len(self._prices)
+        while low < high:
+            middle = (low + high) // 2
+            if self._title(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self._prices) and self._title(low) == key:
+            return low
+        return -1
+
+    def _price(self, position):
+        """Return the price at a position, None for a missing price."""
+        kind = self._kinds[position]
+        if kind == PRICE_NONE:
+            return None
+        price = self._prices[position]
+        return int(price) if kind == PRICE_INT else price
+
+    def _decode_all(self):
+        """Decode every title and price into the memo dictionary."""
+        self._memo = {self._title(position).decode('utf-8'):
+                      self._price(position)
+                      for position in self._order}
+        self._complete = True
+
+    def __getitem__(self, title):
+        """Return the price of a title."""
+        if title in self._memo:
+            return self._memo[title]
+        if self._complete:
+            raise KeyError(title)
+        self._searches += 1
+        if self._searches > len(self._prices) >> 4:
+            self._decode_all()
+            return self._memo[title]
+        position = self._find(title) if isinstance(title, str) else -1
+        if position < 0:
+            raise KeyError(title)
+        price = self._memo[title] = self._price(position)
+        return price
+
+    def get(self, title, default=None):
+        """Return the price of a title, or ``default`` if it is missing."""
+        try:
+            return self[title]
+        except KeyError:
+            return default
+
+    def __iter__(self):
+        """Iterate over the titles in catalogue order."""
+        for position in self._order:
+            yield self._title(position).decode('utf-8')
+
+    def __len__(self):
+        """Return the number of titles."""
+        return len(self._prices)
+
+    @classmethod
+    def from_index(cls, price_index):
+        """
+        Compile a title to price dictionary.
+
+        Args:
+            price_index (dict): The price of each title.
+
+        Returns:
+            CompiledCatalogue: The compiled index.
+
+        Raises:
+            ValueError: If a price is not a float, an int that a double
+            holds exactly, or None.
+        """
+        items = sorted((title.encode('utf-8'), index, price)
+                       for index, (title, price)
+                       in enumerate(price_index.items()))
+        offsets = array('Q', [0])
+        prices = array('d')
+        kinds = array('B')
+        order = array('Q', [0]) * len(items)
+        for position, (title, index, price) in enumerate(items):
+            order[index] = position
+            offsets.append(offsets[-1] + len(title))
+            if price is None:
+                kind, price = PRICE_NONE, 0.0
+            elif type(price) is int and float(price) == price:
+                kind = PRICE_INT
+            elif type(price) is float:
+                kind = PRICE_FLOAT
+            else:
+                raise ValueError(f"Price of '{title.decode('utf-8')}' "
+                                 f"cannot be cached: {price!r}")
+            prices.append(price)
+            kinds.append(kind)
+        return cls(b"".join(title for title, _, _ in items), offsets,
+                   prices, kinds, order)
+
+
+def write_catalogue_cache(cache_path, compiled, file_stat, digest):
+    """
+    Write a compiled catalogue to a cache file.
+
+    Args:
+        cache_path (str): The path to the cache file.
+        compiled (CompiledCatalogue): The compiled catalogue.
+        file_stat (os.stat_result): The stat of the catalogue file.
+        digest (bytes): The SHA-1 of the catalogue file.
+    """
+    # pylint: disable=protected-access
+    temporary_path = cache_path + ".tmp"
+    with open(temporary_path, 'wb') as cache_file:
+        cache_file.write(CACHE_HEADER.pack(
+            CACHE_MAGIC, file_stat.st_size, file_stat.st_mtime_ns, digest,
+            len(compiled)))
+        compiled._offsets.tofile(cache_file)
+        compiled._order.tofile(cache_file)
+        compiled._prices.tofile(cache_file)
+        compiled._kinds.tofile(cache_file)
+        cache_file.write(compiled._titles)
+    os.replace(temporary_path, cache_path)
+
+
+def read_catalogue_cache(cache_path, catalogue_path):
+    """
+    Read a compiled catalogue if it matches the catalogue file.
+
+    The cache is trusted when the size and modification time of the
+    catalogue are unchanged; otherwise the catalogue is hashed, and a
+    cache with the same hash is kept and stamped with the new time.
+
+    Args:
+        cache_path (str): The path to the cache file.
+        catalogue_path (str): The path to the catalogue file.
+
+    Returns:
+        CompiledCatalogue: The compiled catalogue, or None if the cache
+        is missing or stale.
+    """
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            data = cache_file.read()
+    except OSError:
+        return None
+    if len(data) < CACHE_HEADER.size:
+        return None
+    magic, size, mtime_ns, digest, count = CACHE_HEADER.unpack_from(data)
+    if magic != CACHE_MAGIC:
+        return None
+    file_stat = os.stat(catalogue_path)
+    if (size, mtime_ns) != (file_stat.st_size, file_stat.st_mtime_ns):
+        if size != file_stat.st_size or file_digest(catalogue_path) != digest:
+            return None
+        with open(cache_path, 'r+b') as cache_file:
+            cache_file.write(CACHE_HEADER.pack(
+                magic, size, file_stat.st_mtime_ns, digest, count))
+
+    position = CACHE_HEADER.size
+    offsets = array('Q')
+    offsets.frombytes(
+        data[position:position + (count + 1) * offsets.itemsize])
+    position += (count + 1) * offsets.itemsize
+    order = array('Q')
+    order.frombytes(data[position:position + count * order.itemsize])
+    position += count * order.itemsize
+    prices = array('d')
+    prices.frombytes(data[position:position + count * prices.itemsize])
+    position += count * prices.itemsize
+    kinds = array('B', data[position:position + count])
+    position += count
+    return CompiledCatalogue(data[position:], offsets, prices, kinds, order)
+
+
+def load_price_index(catalogue_path, use_cache=True):
+    """
+    Load the title to price index of a catalogue file.
+
+    With the cache enabled, the compiled cache next to the catalogue is
+    used when it is up to date; otherwise the catalogue is parsed and
+    the cache is written for the next run. A cache that cannot be
+    written is skipped.
+
+    Args:
+        catalogue_path (str): The path to the catalogue JSON file.
+        use_cache (bool): Read and write the compiled cache.
+
+    Returns:
+        Mapping: The price of each title, or None if the catalogue
+        cannot be loaded.
+    """
+    cache_path = catalogue_path + CACHE_SUFFIX
+    if use_cache and os.path.exists(catalogue_path):
+        compiled = read_catalogue_cache(cache_path, catalogue_path)
+        if compiled is not None:
+            return compiled
+    price_catalogue = load_json_file(catalogue_path)
+    if price_catalogue is None:
+        return None
+    price_index = build_price_index(price_catalogue)
+    if not use_cache:
+        return price_index
+    try:
+        compiled = CompiledCatalogue.from_index(price_index)
+        write_catalogue_cache(cache_path, compiled, os.stat(catalogue_path),
+                              file_digest(catalogue_path))
+    except (OSError, ValueError) as e:
+        print(f"Could not write {cache_path}: {e}")
+    return price_index
+
+
+def _price_missing(price_index, product_name, matcher):
+    """
+    Price a product that is not in the catalogue index.
+
+    Without a matcher the product is reported right away; otherwise the
+    matcher records it and may resolve it to a catalogue title.
+
+    Returns:
+        tuple: The price, None if unresolved, and the title used.
+    """
+    if matcher is None:
+        print(f"Price for product '{product_name}'"
+              " not found in price catalogue.")
+        return None, product_name
+    title = matcher.resolve(product_name)
+    if title is None:
+        return None, product_name
+    return price_index.get(title), title
+
+
+def compute_total_cents(price_catalogue, sales_record, matcher=None):
+    """
+    Compute the exact total cost of sales in cents.
+
+    Quantities are multiplied by integer prices and added as Python
+    integers, so the total has no rounding error; lines with a
+    fractional quantity are rounded to the cent by line_cents.
+
+    Args:
+        price_catalogue (list or Mapping): The catalogue of prices, or
+        an index made by build_cents_index.
+        sales_record (iterable): The sales records.
+        matcher (ProductMatcher): Collects, and may resolve, products
+        missing from the catalogue instead of printing each line.
+
+    Returns:
+        int: The total cost of sales in cents.
+    """
+    if isinstance(price_catalogue, Mapping):
+        cents_index = price_catalogue
+    else:
+        cents_index = build_cents_index(price_catalogue)
+    total_cents = 0
+    for sale in sales_record:
+        product_name = sale.get('Product')
+        if product_name:
+            item_cents = cents_index.get(product_name)
+            if item_cents is None:
+                item_cents = _price_missing(
+                    cents_index, product_name, matcher)[0]
+            if item_cents is not None:
+                total_cents += line_cents(sale.get('Quantity', 0),
+                                          item_cents)
+        else:
+            print("Error: 'Product' key not found in sale record.")
+    return total_cents
+
+
+def compute_total_cost(price_catalogue, sales_record, matcher=None):
     """
     Compute the total cost of sales.
 
     Args:
-        price_catalogue (dict): The catalogue of prices.
-        sales_record (list): The list of sales records.
+        price_catalogue (list or Mapping): The catalogue of prices, or
+        an index made by build_price_index or load_price_index.
+        sales_record (iterable): The sales records, a list or a stream
+        from iter_sales.
+        matcher (ProductMatcher): Collects, and may resolve, products
+        missing from the catalogue instead of printing each line.
 
     Returns:
         float: The total cost of sales.
 
     """
+    if isinstance(price_catalogue, Mapping):
+        price_index = price_catalogue
+    else:
+        price_index = build_price_index(price_catalogue)
     total_cost = 0
     for sale in sales_record:
         product_name = sale.get('Product')
         if product_name:
-            item_price = next(
-                (product['price'] for product in price_catalogue
-                    if product['title'] == product_name), None)
+            item_price = price_index.get(product_name)
+            if item_price is None:
+                item_price = _price_missing(
+                    price_index, product_name, matcher)[0]
             if item_price is not None:
                 total_cost += sale.get('Quantity', 0) * item_price
-            else:
-                print(f"Price for product '{product_name}'"
-                      " not found in price catalogue.")
         else:
             print("Error: 'Product' key not found in sale record.")
     return round(total_cost, 2)
 
 
+def aggregate_sales(price_catalogue, sales_record, groupings=None,
+                    exact=False, matcher=None):
+    """
+    Compute the total cost of sales and grouped subtotals in one pass.
+
+    Each group accumulates the cost, the quantity and the number of
+    priced lines of its records. Records whose product is not in the
+    catalogue are reported and left out, as in compute_total_cost.
+
+    Args:
+        price_catalogue (list): The catalogue of products.
+        sales_record (iterable): The sales records.
+        groupings (iterable): Names from GROUPINGS to group by; all of
+        them by default.
+        exact (bool): Accumulate costs as integer cents, rounding lines
+        with a fractional quantity as line_cents does.
+        matcher (ProductMatcher): Collects, and may resolve, products
+        missing from the catalogue; resolved lines are grouped under
+        the matched title.
+
+    Returns:
+        tuple: The total cost, rounded to cents or as integer cents in
+        exact mode, and a dictionary mapping each grouping to its
+        groups, each a [cost, quantity, lines] list in order of first
+        appearance.
+
+    Raises:
+        ValueError: If a grouping is unknown.
+    """
+    groupings = list(GROUPINGS if groupings is None else groupings)
+    for grouping in groupings:
+        if grouping not in GROUPINGS:
+            raise ValueError(f"Unknown grouping: {grouping}")
+    if exact:
+        price_index = build_cents_index(price_catalogue)
+    else:
+        price_index = build_price_index(price_catalogue)
+    type_index = build_type_index(price_catalogue)
+    groups = {grouping: {} for grouping in groupings}
+    keyed = [(groups[grouping], GROUPINGS[grouping])
+             for grouping in groupings if grouping != "type"]
+    by_type = groups.get("type")
+
+    total_cost = 0
+    for sale in sales_record:
+        product_name = sale.get('Product')
+        if not product_name:
+            print("Error: 'Product' key not found in sale record.")
+            continue
+        item_price = price_index.get(product_name)
+        if item_price is None:
+            item_price, product_name = _price_missing(
+                price_index, product_name, matcher)
+            if item_price is None:
+                continue
+        quantity = sale.get('Quantity', 0)
+        if exact:
+            cost = line_cents(quantity, item_price)
+        else:
+            cost = quantity * item_price
+        total_cost += cost
+        for table, field in keyed:
+            key = product_name if field == 'Product' else sale.get(field)
+            group = table.get(key)
+            if group is None:
+                group = table[key] = [0, 0, 0]
+            group[0] += cost
+            group[1] += quantity
+            group[2] += 1
+        if by_type is not None:
+            group = by_type.setdefault(type_index[product_name], [0, 0, 0])
+            group[0] += cost
+            group[1] += quantity
+            group[2] += 1
+    if exact:
+        return total_cost, groups
+    return round(total_cost, 2), groups
+
+
+def _init_worker(price_index, trigram_index=None):
+    """Store the catalogue indexes in a worker process."""
+    global _WORKER_INDEX, _WORKER_TRIGRAMS  # pylint: disable=global-statement
+    _WORKER_INDEX = price_index
+    _WORKER_TRIGRAMS = trigram_index
+
+
+def price_sales_file(job):
+    """
+    Compute the total cost of one sales file with the worker index.
+
+    Args:
+        job (tuple): The path to the sales file, whether the index
+        holds integer cents, and the similarity threshold of the
+        matcher; without a threshold missing products are printed.
+
+    Returns:
+        tuple: The path, the total (None on error), an error message
+        (None on success) and the matcher of the file, if any.
+    """
+    sales_path, exact, threshold = job
+    compute = compute_total_cents if exact else compute_total_cost
+    matcher = None
+    if threshold is not None:
+        matcher = ProductMatcher(_WORKER_TRIGRAMS, threshold)
+    try:
+        total = compute(_WORKER_INDEX, iter_sales(sales_path), matcher)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        return sales_path, None, f"Error loading {sales_path}: {e}", None
+    if matcher is not None:
+        # Only the counts travel back to the parent process.
+        matcher.index = None
+    return sales_path, total, None, matcher
+
+
+def compute_file_totals(price_catalogue, sales_paths, workers=None,
+                        exact=False, matcher=None):
+    """
+    Compute the total cost of several sales files in parallel.
+
+    The catalogue index is built once. Where processes are forked, the
+    workers inherit it copy-on-write from the parent; elsewhere each
+    worker receives it once when it starts rather than with every file.
+
+    Args:
+        price_catalogue (list or Mapping): The catalogue of products,
+        or a title to price index.
+        sales_paths (list): The paths to the sales files.
+        workers (int): Number of worker processes; one per CPU by
+        default, and the files are priced in this process if 1.
+        exact (bool): Compute the totals as integer cents.
+        matcher (ProductMatcher): Receives the missing products of
+        every file; its trigram index is shared with the workers like
+        the catalogue index.
+
+    Returns:
+        tuple: A list of (path, total, error) tuples in the order of
+        sales_paths, and the grand total of the files that loaded.
+    """
+    if exact:
+        price_index = build_cents_index(price_catalogue)
+    elif isinstance(price_catalogue, Mapping):
+        price_index = price_catalogue
+    else:
+        price_index = build_price_index(price_catalogue)
+    trigram_index = matcher.index if matcher is not None else None
+    threshold = matcher.threshold if matcher is not None else None
+    _init_worker(price_index, trigram_index)
+    jobs = [(sales_path, exact, threshold) for sales_path in sales_paths]
+
+    if workers == 1 or len(jobs) <= 1:
+        results = [price_sales_file(job) for job in jobs]
+    elif "fork" in multiprocessing.get_all_start_methods():
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("fork")) as executor:
+            results = list(executor.map(price_sales_file, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_worker,
+                                 initargs=(price_index, trigram_index)
+                                 ) as executor:
+            results = list(executor.map(price_sales_file, jobs))
+
+    for _, _, _, file_matcher in results:
+        if file_matcher is not None:
+            matcher.merge(file_matcher)
+    results = [result[:3] for result in results]
+    grand_total = sum(total for _, total, _ in results if total is not None)
+    if not exact:
+        grand_total = round(grand_total, 2)
+    return results, grand_total
+
+
+def load_checkpoint(checkpoint_path):
+    """
+    Load a saved checkpoint, or return an empty one.
+
+    Args:
+        checkpoint_path (str): The path to the checkpoint file.
+
+    Returns:
+        dict: The per-file entries of the checkpoint, keyed by path.
+    """
+    try:
+        with open(checkpoint_path, 'r', encoding='utf-8') as checkpoint:
+            return json.load(checkpoint).get("files", {})
+    except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+        return {}
+
+
+def save_checkpoint(files, checkpoint_path):
+    """
+    Save the per-file entries of a checkpoint.
+
+    Args:
+        files (dict): The per-file entries, keyed by path.
+        checkpoint_path (str): The path to the checkpoint file.
+    """
+    with open(checkpoint_path, 'w', encoding='utf-8') as checkpoint:
+        json.dump({"version": 1, "files": files}, checkpoint)
+
+
+def _tail_fingerprint(file_path, offset):
+    """Return a hash of the 64 bytes just before an offset."""
+    with open(file_path, 'rb') as file:
+        file.seek(max(0, offset - 64))
+        tail = file.read(offset - max(0, offset - 64))
+    return hashlib.sha1(tail).hexdigest()
+
+
+def update_sales_checkpoint(sales_path, entry, cents_index, catalogue,
+                            matcher):
+    """
+    Bring the running total of one sales file up to date.
+
+    The saved total is kept, and only the records after the saved
+    offset are priced, when the catalogue fingerprint matches and the
+    bytes just before the offset are unchanged; otherwise the file is
+    priced again from the start. Records before the offset are assumed
+    not to change, as in an append-only log.
+
+    Args:
+        sales_path (str): The path to the sales file.
+        entry (dict): The saved entry of the file, or None.
+        cents_index (Mapping): The price in cents of each title.
+        catalogue (str): The fingerprint of the catalogue file.
+        matcher (ProductMatcher): Receives the missing products of the
+        whole file, including those saved in the entry.
+
+    Returns:
+        tuple: The updated entry and the number of records priced.
+    """
+    file_stat = os.stat(sales_path)
+    if not (entry and entry["catalogue"] == catalogue
+            and entry["offset"] <= file_stat.st_size
+            and _tail_fingerprint(sales_path, entry["offset"])
+            == entry["tail"]):
+        entry = {"offset": 0, "records": 0, "total_cents": 0,
+                 "format": sales_format(sales_path), "missing": {}}
+    file_matcher = ProductMatcher(matcher.index, matcher.threshold)
+    for name, (title, lines) in entry["missing"].items():
+        file_matcher.matches[name] = title
+        file_matcher.lines[name] = lines
+    progress = [entry["offset"], entry["records"]]
+
+    if (entry.get("size"), entry.get("mtime_ns")) != (
+            file_stat.st_size, file_stat.st_mtime_ns):
+        def records():
+            for record, end in iter_sales_from(
+                    sales_path, entry["offset"], entry["format"]):
+                yield record
+                progress[0] = end
+                progress[1] += 1
+
+        total_cents = entry["total_cents"] + compute_total_cents(
+            cents_index, records(), file_matcher)
+    else:
+        total_cents = entry["total_cents"]
+
+    matcher.merge(file_matcher)
+    offset, record_count = progress
+    missing = {name: [file_matcher.matches[name], lines]
+               for name, lines in file_matcher.lines.items()}
+    return {"size": file_stat.st_size,
+            "mtime_ns": file_stat.st_mtime_ns,
+            "offset": offset,
+            "records": record_count,
+            "total_cents": total_cents,
+            "catalogue": catalogue,
+            "tail": _tail_fingerprint(sales_path, offset),
+            "format": entry["format"] or sales_format(sales_path),
+            "missing": missing}, record_count - entry["records"]
+
+
+def compute_incremental_totals(price_index, catalogue_path, sales_paths,
+                               matcher, checkpoint_path=CHECKPOINT_FILE):
+    """
+    Compute the total cost in cents of growing sales files.
+
+    Args:
+        price_index (Mapping): The price of each title.
+        catalogue_path (str): The path to the catalogue file, whose
+        hash decides whether saved totals are still valid.
+        sales_paths (list): The paths to the sales files.
+        matcher (ProductMatcher): Receives the missing products.
+        checkpoint_path (str): The path to the checkpoint file.
+
+    Returns:
+        tuple: A list of (path, total, error) tuples in the order of
+        sales_paths, and the grand total in cents.
+    """
+    cents_index = build_cents_index(price_index)
+    catalogue = file_digest(catalogue_path).hex()
+    if matcher.index is not None:
+        catalogue += f":fuzzy={matcher.threshold}"
+    saved = load_checkpoint(checkpoint_path)
+    entries = {}
+    results = []
+    for sales_path in sales_paths:
+        key = os.path.abspath(sales_path)
+        try:
+            entry, priced = update_sales_checkpoint(
+                sales_path, saved.get(key), cents_index, catalogue, matcher)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            results.append((sales_path, None,
+                            f"Error loading {sales_path}: {e}"))
+            continue
+        entries[key] = entry
+        print(f"{sales_path}: {priced} records priced, "
+              f"{entry['records']} in total")
+        results.append((sales_path, entry["total_cents"], None))
+    save_checkpoint(entries, checkpoint_path)
+    grand_total = sum(total for _, total, _ in results if total is not None)
+    return results, grand_total
+
+
+def format_file_totals(results, exact=False):
+    """
+    Format the per-file totals as a tab-separated table.
+
+    Args:
+        results (list): The results returned by compute_file_totals.
+        exact (bool): The totals are integer cents.
+
+    Returns:
+        list: The lines of the table.
+    """
+    lines = ["", "Sales by file:", "File\tTotal"]
+    for sales_path, total, error in results:
+        if total is None:
+            lines.append(f"{sales_path}\t{error}")
+        else:
+            total = format_cents(total) if exact else total
+            lines.append(f"{sales_path}\t{total}")
+    return lines
+
+
+def format_groups(groups, exact=False):
+    """
+    Format grouped subtotals as tab-separated tables.
+
+    Args:
+        groups (dict): The groups returned by aggregate_sales.
+        exact (bool): The costs are integer cents.
+
+    Returns:
+        list: The lines of the tables.
+    """
+    lines = []
+    for grouping, table in groups.items():
+        lines.append("")
+        lines.append(f"Sales by {grouping}:")
+        lines.append(f"{GROUPINGS[grouping]}\tTotal\tQuantity\tLines")
+        for key, (cost, quantity, count) in table.items():
+            cost = format_cents(cost) if exact else round(cost, 2)
+            lines.append(f"{key}\t{cost}\t{quantity}\t{count}")
+    return lines
+
+
 def main():
     """
     The main function to compute the total cost of sales.
 
     """
-    if len(sys.argv) != 3:
-        print("Usage: python compute_sales.py "
+    parser = argparse.ArgumentParser(
+        usage="python compute_sales.py "
               "priceCatalogue.json salesRecord.json")
-        return
+    parser.add_argument("price_catalogue")
+    parser.add_argument("sales_record", nargs="+")
+    parser.add_argument("--group-by", default=None,
+                        help="comma-separated groupings: "
+                             + ", ".join(GROUPINGS) + ", or all")
+    parser.add_argument("--exact", action="store_true",
+                        help="accumulate exact integer cents")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes pricing several files")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="do not read or write the catalogue cache")
+    parser.add_argument("--fuzzy", type=float, nargs="?", default=None,
+                        const=DEFAULT_THRESHOLD, metavar="THRESHOLD",
+                        help="match missing products to similar titles")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only price records appended since the "
+                             "last run, using " + CHECKPOINT_FILE)
+    args = parser.parse_args()
+
+    if args.group_by and len(args.sales_record) > 1:
+        parser.error("--group-by takes a single sales file")
+    if args.group_by and args.incremental:
+        parser.error("--group-by cannot be combined with --incremental")
+    if args.fuzzy is not None and not 0 <= args.fuzzy <= 1:
+        parser.error("--fuzzy THRESHOLD must be between 0 and 1")
+
+    groupings = None
+    if args.group_by:
+        groupings = (list(GROUPINGS) if args.group_by == "all"
+                     else args.group_by.split(","))
+        unknown = [name for name in groupings if name not in GROUPINGS]
+        if unknown:
+            parser.error(f"unknown grouping: {', '.join(unknown)}")
 
     start_time = time.time()
 
-    price_catalogue_path = sys.argv[1]
-    sales_record_path = sys.argv[2]
+    price_catalogue_path = args.price_catalogue
+    sales_record_path = args.sales_record[0]
 
-    price_catalogue = load_json_file(price_catalogue_path)
-    sales_record = load_json_file(sales_record_path)
+    if groupings:
+        price_catalogue = load_json_file(price_catalogue_path)
+    else:
+        price_catalogue = load_price_index(price_catalogue_path,
+                                           not args.no_cache)
+
+    if price_catalogue is None:
+        return
 
-    if price_catalogue is None or sales_record is None:
+    trigram_index = None
+    if args.fuzzy is not None:
+        # Both indexes list the titles in catalogue order, which
+        # breaks ties between equally similar titles.
+        titles = (price_catalogue if isinstance(price_catalogue, Mapping)
+                  else build_price_index(price_catalogue))
+        trigram_index = TrigramIndex(titles)
+    matcher = ProductMatcher(
+        trigram_index,
+        DEFAULT_THRESHOLD if args.fuzzy is None else args.fuzzy)
+
+    group_lines = []
+    try:
+        if args.incremental:
+            results, total_cost = compute_incremental_totals(
+                price_catalogue, price_catalogue_path, args.sales_record,
+                matcher)
+            for _, _, error in results:
+                if error:
+                    print(error)
+            if len(results) > 1:
+                group_lines = format_file_totals(results, True)
+            total_cost = format_cents(total_cost)
+        elif len(args.sales_record) > 1:
+            results, total_cost = compute_file_totals(
+                price_catalogue, args.sales_record, args.workers,
+                args.exact, matcher)
+            for _, _, error in results:
+                if error:
+                    print(error)
+            group_lines = format_file_totals(results, args.exact)
+            if args.exact:
+                total_cost = format_cents(total_cost)
+        elif groupings:
+            total_cost, groups = aggregate_sales(
+                price_catalogue, iter_sales(sales_record_path), groupings,
+                args.exact, matcher)
+            group_lines = format_groups(groups, args.exact)
+            if args.exact:
+                total_cost = format_cents(total_cost)
+        elif args.exact:
+            total_cost = format_cents(compute_total_cents(
+                build_cents_index(price_catalogue),
+                iter_sales(sales_record_path), matcher))
+        else:
+            total_cost = compute_total_cost(
+                price_catalogue, iter_sales(sales_record_path), matcher)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"Error loading {sales_record_path}: {e}")
         return
 
-    total_cost = compute_total_cost(price_catalogue, sales_record)
+    group_lines += matcher.report()
 
     end_time = time.time()
     execution_time = end_time - start_time
 
     print(f"Total cost of sales: ${total_cost}")
+    for line in group_lines:
+        print(line)
     print(f"Execution time: {execution_time} seconds")
 
     with open("SalesResults.txt", "w", encoding='utf-8') as results_file:
         results_file.write(f"Total cost of sales: ${total_cost}\n")
+        for line in group_lines:
+            results_file.write(line + "\n")
         results_file.write(f"Execution time: {execution_time} seconds\n")
 
 
@@ -0,0 +1,167 @@
+"""
+
+Fuzzy matching of sale product names against catalogue titles.
+
+TrigramIndex maps every character trigram of the catalogue titles to
+the titles containing it, so the candidates for a misspelled name are
+found through the postings of its own trigrams instead of comparing it
+with every title. ProductMatcher resolves the names missing from the
+catalogue once each and keeps how many sale lines were matched or left
+unresolved, so they can be reported together.
+
+Author: Najk
+Date: 01-02-2024.
+"""
+
+from collections import Counter
+
+DEFAULT_THRESHOLD = 0.6
+
+
+def trigrams(text):
+    """
+    Return the character trigrams of a product name.
+
+    Case and repeated whitespace are ignored, and the name is padded
+    with spaces so its first and last letters form trigrams too.
+
+    Args:
+        text (str): The product name.
+
+    Returns:
+        set: The distinct trigrams.
+    """
+    normalized = f"  {' '.join(text.lower().split())} "
+    return {normalized[index:index + 3]
+            for index in range(len(normalized) - 2)}
+
+
+class TrigramIndex:
+    """
+    Inverted index from character trigrams to catalogue titles.
+    """
+
+    def __init__(self, titles):
+        """
+        Index a collection of titles.
+
+        Args:
+            titles (iterable): The catalogue titles.
+        """
+        self.titles = list(titles)
+        self.sizes = []
+        self.postings = {}
+        for position, title in enumerate(self.titles):
+            title_trigrams = trigrams(title)
+            self.sizes.append(len(title_trigrams))
+            for trigram in title_trigrams:
+                self.postings.setdefault(trigram, []).append(position)
+
+    def search(self, name, threshold=DEFAULT_THRESHOLD):
+        """
+        Find the title most similar to a name.
+
+        Similarity is the Dice coefficient of the trigram sets. Ties
+        keep the title listed first in the catalogue.
+
+        Args:
+            name (str): The product name to match.
+            threshold (float): Lowest similarity accepted, from 0 to 1.
+
+        Returns:
+            tuple: The best title and its similarity, or None if no
+            title reaches the threshold.
+        """
+        name_trigrams = trigrams(name)
+        shared = Counter()
+        for trigram in name_trigrams:
+            shared.update(self.postings.get(trigram, ()))
+        size = len(name_trigrams)
+        best = max(((2 * count / (size + self.sizes[position]), -position)
+                    for position, count in shared.items()), default=None)
+        if best is None or best[0] < threshold:
+            return None
+        score, position = best
+        return self.titles[-position], score
+
+
+class ProductMatcher:
+    """
+    Resolves product names missing from the catalogue.
+
+    Each distinct name is looked up in the trigram index once; the
+    number of sale lines of every matched and unresolved name is
+    counted for the final report.
+    """
+
+    def __init__(self, index=None, threshold=DEFAULT_THRESHOLD):
+        """
+        Initialize a matcher.
+
+        Args:
+            index (TrigramIndex): The index of the catalogue titles;
+            without one, every missing name stays unresolved.
+            threshold (float): Lowest similarity accepted.
+        """
+        self.index = index
+        self.threshold = threshold
+        self.matches = {}
+        self.lines = Counter()
+
+    def resolve(self, name):
+        """
+        Return the catalogue title a missing product name stands for.
+
+        Args:
+            name (str): A product name not found in the catalogue.
+
+        Returns:
+            str: The matched title, or None if it is unresolved.
+        """
+        if name not in self.matches:
+            found = None
+            if self.index is not None:
+                found = self.index.search(name, self.threshold)
+            self.matches[name] = found[0] if found else None
+        self.lines[name] += 1
+        return self.matches[name]
+
+    def merge(self, other):
+        """
+        Add the counts of another matcher to this one.
+
+        Args:
+            other (ProductMatcher): The matcher to merge.
+
+        Returns:
+            ProductMatcher: The matcher itself.
+        """
+        self.matches.update(other.matches)
+        self.lines.update(other.lines)
+        return self
+
+    def report(self):
+        """
+        Format the matched and unresolved names as tables.
+
+        Returns:
+            list: The lines of the report; empty if every product was
+            found in the catalogue.
+        """
+        matched = [(name, self.matches[name], count)
+                   for name, count in self.lines.most_common()
+                   if self.matches[name] is not None]
+        unresolved = [(name, count)
+                      for name, count in self.lines.most_common()
+                      if self.matches[name] is None]
+        lines = []
+        if matched:
+            lines += ["", "Fuzzy matched products:",
+                      "Product\tCatalogue title\tLines"]
+            lines += [f"{name}\t{title}\t{count}"
+                      for name, title, count in matched]
+        if unresolved:
+            lines += ["", "Products not found in price catalogue:",
+                      "Product\tLines"]
+            lines += [f"{name}\t{count}" for name, count in unresolved]
+        return lines
@@ -0,0 +1,411 @@
+"""
+
+Columnar on-disk store of sales records.
+
+A sales file is converted once into a directory holding one binary
+column per field: the sale ID, the date and the product as int32
+indexes into dictionaries of the values seen, so the values are kept as
+written, and the quantity as int32. Records that do not fit, such as a
+fractional quantity, are reported and left out. Later analyses read
+the columns with NumPy memory maps, or the array module when NumPy is
+not installed, and compute totals and grouped subtotals as column
+scans instead of parsing the JSON again.
+
+Usage: python sales_store.py convert sales.json storeDirectory
+       python sales_store.py total Catalogue.json storeDirectory
+                            [--exact] [--group-by sale,date]
+
+Author: Najk
+Date: 01-02-2024.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from array import array
+
+import compute_sales
+from fuzzy_match import ProductMatcher
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+HAS_NUMPY = np is not None
+
+META_FILE = "store.json"
+STORE_VERSION = 2
+COLUMNS = {"sale_id": "i", "date": "i", "product": "i", "quantity": "i"}
+QUANTITY_RANGE = range(-2 ** 31, 2 ** 31)
+
+
+class SalesStore:
+    """
+    Read-only view of a converted sales directory.
+    """
+
+    def __init__(self, directory):
+        """
+        Open a store and map its columns.
+
+        Args:
+            directory (str): The directory written by convert.
+
+        Raises:
+            FileNotFoundError: If the directory holds no store.
+            ValueError: If the store was written by another version of
+            this module or on a machine with a different byte order.
+        """
+        with open(os.path.join(directory, META_FILE), 'r',
+                  encoding='utf-8') as meta_file:
+            meta = json.load(meta_file)
+        if meta.get("version") != STORE_VERSION:
+            raise ValueError("The store was written by another version; "
+                             "convert the sales again.")
+        if meta["byteorder"] != sys.byteorder:
+            raise ValueError("The store was written with another byte "
+                             "order.")
+        self.directory = directory
+        self.rows = meta["rows"]
+        self.sale_ids = meta["sale_ids"]
+        self.dates = meta["dates"]
+        self.products = meta["products"]
+        self.columns = {name: self._load_column(name, typecode)
+                        for name, typecode in meta["columns"].items()}
+
+    def _load_column(self, name, typecode):
+        """Map a column file as a NumPy array, or read it as an array."""
+        path = os.path.join(self.directory, name + ".bin")
+        if HAS_NUMPY:
+            if not self.rows:
+                return np.zeros(0, dtype=typecode)
+            return np.memmap(path, dtype=typecode, mode='r',
+                             shape=(self.rows,))
+        column = array(typecode)
+        with open(path, 'rb') as column_file:
+            column.fromfile(column_file, self.rows)
+        return column
+
+    @classmethod
+    def convert(cls, sales_record, directory):
+        """
+        Convert sales records into a columnar store.
+
+        Records with a quantity that is not an integer in the int32
+        range, or with an array or object as sale ID, date or product,
+        are reported with their position and left out.
+
+        Args:
+            sales_record (iterable): The sales records, e.g. from
+            compute_sales.iter_sales.
+            directory (str): The directory to write; it is created if
+            needed and its columns are replaced.
+
+        Returns:
+            SalesStore: The new store.
+        """
+        os.makedirs(directory, exist_ok=True)
+        columns = {name: array(typecode)
+                   for name, typecode in COLUMNS.items()}
+        sale_ids = columns["sale_id"]
+        dates = columns["date"]
+        products = columns["product"]
+        quantities = columns["quantity"]
+        sale_id_codes = {}
+        date_codes = {}
+        product_ids = {}
+        for position, sale in enumerate(sales_record, 1):
+            quantity = sale.get('Quantity', 0)
+            sale_id = sale.get('SALE_ID')
+            date = sale.get('SALE_Date')
+            product_name = sale.get('Product')
+            if (not isinstance(quantity, int)
+                    or quantity not in QUANTITY_RANGE):
+                print(f"Error: invalid Quantity {quantity!r} in sale "
+                      f"record {position}; skipped.")
+                continue
+            if any(isinstance(value, (list, dict))
+                   for value in (sale_id, date, product_name)):
+                print(f"Error: invalid SALE_ID, SALE_Date or Product in "
+                      f"sale record {position}; skipped.")
+                continue
+            sale_ids.append(sale_id_codes.setdefault(
+                sale_id, len(sale_id_codes)))
+            dates.append(date_codes.setdefault(date, len(date_codes)))
+            if product_name:
+                product_id = product_ids.setdefault(
+                    product_name, len(product_ids))
+            else:
+                product_id = -1
+            products.append(product_id)
+            quantities.append(quantity)
+
+        for name, column in columns.items():
+            with open(os.path.join(directory, name + ".bin"),
+                      'wb') as column_file:
+                column.tofile(column_file)
+        with open(os.path.join(directory, META_FILE), 'w',
+                  encoding='utf-8') as meta_file:
+            json.dump({"version": STORE_VERSION,
+                       "rows": len(quantities),
+                       "byteorder": sys.byteorder,
+                       "columns": COLUMNS,
+                       "sale_ids": list(sale_id_codes),
+                       "dates": list(date_codes),
+                       "products": list(product_ids)}, meta_file)
+        return cls(directory)
+
+    def _product_prices(self, price_index):
+        """Return the price of each product ID, None if unknown."""
+        return [price_index.get(product) for product in self.products]
+
+    def report_missing(self, prices, matcher):
+        """
+        Record the products missing from the catalogue in a matcher.
+
+        Args:
+            prices (list): The price of each product ID.
+            matcher (ProductMatcher): Receives the number of sale lines
+            of each missing product, for its report.
+
+        Returns:
+            int: Number of sale lines left out.
+        """
+        lines = self.product_lines()
+        missing = 0
+        for product, price, count in zip(self.products, prices, lines):
+            if price is None and count:
+                matcher.matches[product] = None
+                matcher.lines[product] += count
+                missing += count
+        unnamed = self.rows - sum(lines)
+        if unnamed:
+            print(f"Error: 'Product' key not found in {unnamed} sale "
+                  "records.")
+        return missing + unnamed
+
+    def product_lines(self):
+        """Return the number of sale lines of each product ID."""
+        products = self.columns["product"]
+        if HAS_NUMPY:
+            named = products[products >= 0]
+            return [int(count) for count in np.bincount(
+                named, minlength=len(self.products))]
+        lines = [0] * len(self.products)
+        for product in products:
+            if product >= 0:
+                lines[product] += 1
+        return lines
+
+    def product_quantities(self):
+        """Return the total quantity sold of each product ID."""
+        products = self.columns["product"]
+        quantities = self.columns["quantity"]
+        if HAS_NUMPY:
+            named = products >= 0
+            totals = np.zeros(len(self.products), dtype=np.int64)
+            np.add.at(totals, products[named],
+                      quantities[named].astype(np.int64))
+            return [int(total) for total in totals]
+        totals = [0] * len(self.products)
+        for product, quantity in zip(products, quantities):
+            if product >= 0:
+                totals[product] += quantity
+        return totals
+
+    def total_cost(self, price_index, exact=False, matcher=None):
+        """
+        Compute the total cost of the stored sales.
+
+        The quantities are summed per product with one column scan and
+        then priced once per product.
+
+        Args:
+            price_index (Mapping): The price of each product title.
+            exact (bool): Price in integer cents and return the cents.
+            matcher (ProductMatcher): Collects the products missing from
+            the catalogue; without one, their table is printed.
+
+        Returns:
+            float or int: The total rounded to cents, or the exact
+            total in cents.
+        """
+        if exact:
+            price_index = compute_sales.build_cents_index(price_index)
+        prices = self._product_prices(price_index)
+        if matcher is None:
+            matcher = ProductMatcher()
+            self.report_missing(prices, matcher)
+            for line in matcher.report():
+                print(line)
+        else:
+            self.report_missing(prices, matcher)
+        total = sum(quantity * price for quantity, price
+                    in zip(self.product_quantities(), prices)
+                    if price is not None)
+        return total if exact else round(total, 2)
+
+    def _group_keys(self, grouping, type_index):
+        """Return the key column of a grouping and a key formatter."""
+        if grouping == "sale":
+            return self.columns["sale_id"], self.sale_ids.__getitem__
+        if grouping == "date":
+            return self.columns["date"], self.dates.__getitem__
+        if grouping == "product":
+            return self.columns["product"], self.products.__getitem__
+        product_types = [str(type_index.get(product))
+                         for product in self.products]
+        types = sorted(set(product_types))
+        type_codes = {name: code for code, name in enumerate(types)}
+        codes = [type_codes[name] for name in product_types]
+        products = self.columns["product"]
+        if HAS_NUMPY:
+            keys = np.asarray(codes, dtype=np.int64)[
+                np.maximum(products, 0)]
+        else:
+            keys = array('q', (codes[product] if product >= 0 else 0
+                               for product in products))
+        return keys, types.__getitem__
+
+    def group_totals(self, grouping, price_index, exact=False,
+                     type_index=None):
+        """
+        Compute grouped subtotals of the priced sale lines.
+
+        Args:
+            grouping (str): "sale", "date", "product" or "type".
+            price_index (Mapping): The price of each product title.
+            exact (bool): Accumulate integer cents.
+            type_index (dict): The type of each product title, needed
+            to group by type.
+
+        Returns:
+            dict: [cost, quantity, lines] of each group in order of
+            first appearance, like compute_sales.aggregate_sales.
+        """
+        if exact:
+            price_index = compute_sales.build_cents_index(price_index)
+        prices = self._product_prices(price_index)
+        keys, label = self._group_keys(grouping, type_index or {})
+        products = self.columns["product"]
+        quantities = self.columns["quantity"]
+
+        if not HAS_NUMPY:
+            groups = {}
+            for key, product, quantity in zip(keys, products, quantities):
+                price = prices[product] if product >= 0 else None
+                if price is None:
+                    continue
+                group = groups.setdefault(label(key), [0, 0, 0])
+                group[0] += quantity * price
+                group[1] += quantity
+                group[2] += 1
+            return groups
+
+        priced = np.asarray([price is not None for price in prices] + [False])
+        price_vector = np.asarray(
+            [price or 0 for price in prices] + [0],
+            dtype=np.int64 if exact else np.float64)
+        product_ids = np.where(products >= 0, products, len(prices))
+        mask = priced[product_ids]
+        keys = np.asarray(keys)[mask]
+        quantities = np.asarray(quantities, dtype=np.int64)[mask]
+        costs = quantities * price_vector[product_ids[mask]]
+        unique, first, inverse = np.unique(
+            keys, return_index=True, return_inverse=True)
+        count = len(unique)
+        if exact:
+            sums = np.zeros(count, dtype=np.int64)
+            np.add.at(sums, inverse, costs)
+        else:
+            sums = np.bincount(inverse, weights=costs, minlength=count)
+        totals = np.zeros(count, dtype=np.int64)
+        np.add.at(totals, inverse, quantities)
+        lines = np.bincount(inverse, minlength=count)
+        return {label(unique[group]): [sums[group].item(),
+                                       int(totals[group]),
+                                       int(lines[group])]
+                for group in np.argsort(first, kind='stable')}
+
+
+def main():
+    """
+    Main function to execute the script.
+    """
+    parser = argparse.ArgumentParser(
+        usage="python sales_store.py command ...")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert_parser = commands.add_parser("convert")
+    convert_parser.add_argument("sales_record")
+    convert_parser.add_argument("store")
+    total_parser = commands.add_parser("total")
+    total_parser.add_argument("price_catalogue")
+    total_parser.add_argument("store")
+    total_parser.add_argument("--exact", action="store_true",
+                              help="accumulate exact integer cents")
+    total_parser.add_argument("--group-by", default=None,
+                              help="comma-separated groupings: "
+                                   + ", ".join(compute_sales.GROUPINGS))
+    args = parser.parse_args()
+
+    start_time = time.time()
+
+    if args.command == "convert":
+        try:
+            store = SalesStore.convert(
+                compute_sales.iter_sales(args.sales_record), args.store)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            print(f"Error loading {args.sales_record}: {e}")
+            return
+        print(f"Converted {store.rows} sales records into {args.store}")
+        print(f"Execution time: {time.time() - start_time} seconds")
+        return
+
+    groupings = args.group_by.split(",") if args.group_by else []
+    unknown = [name for name in groupings
+               if name not in compute_sales.GROUPINGS]
+    if unknown:
+        parser.error(f"unknown grouping: {', '.join(unknown)}")
+
+    price_index = compute_sales.load_price_index(args.price_catalogue)
+    if price_index is None:
+        return
+    type_index = None
+    if "type" in groupings:
+        type_index = compute_sales.build_type_index(
+            compute_sales.load_json_file(args.price_catalogue) or [])
+    try:
+        store = SalesStore(args.store)
+    except FileNotFoundError as e:
+        print(f"Error loading {args.store}: {e}")
+        return
+
+    matcher = ProductMatcher()
+    total_cost = store.total_cost(price_index, args.exact, matcher)
+    if args.exact:
+        total_cost = compute_sales.format_cents(total_cost)
+    groups = {grouping: store.group_totals(grouping, price_index,
+                                           args.exact, type_index)
+              for grouping in groupings}
+    group_lines = compute_sales.format_groups(groups, args.exact)
+    group_lines += matcher.report()
+
+    execution_time = time.time() - start_time
+
+    print(f"Total cost of sales: ${total_cost}")
+    for line in group_lines:
+        print(line)
+    print(f"Execution time: {execution_time} seconds")
+
+    with open("SalesResults.txt", "w", encoding='utf-8') as results_file:
+        results_file.write(f"Total cost of sales: ${total_cost}\n")
+        for line in group_lines:
+            results_file.write(line + "\n")
+        results_file.write(f"Execution time: {execution_time} seconds\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Regression tests for the sales streaming and caching helpers.
+
+Author: Najk
+Date: 01-02-2024.
+"""
+
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import compute_sales
+from fuzzy_match import ProductMatcher
+
+CATALOGUE = [{"title": "Brown eggs", "price": 28.1},
+             {"title": "Asparagus", "price": 18.95}]
+
+
+def sale(sale_id):
+    """Return a sale record alternating between the two products."""
+    product = CATALOGUE[sale_id % 2]["title"]
+    return {"SALE_ID": sale_id, "SALE_Date": "01/12/23",
+            "Product": product, "Quantity": sale_id % 5 + 1}
+
+
+def write_array(path, records, newline):
+    """Write records as an indented JSON array with the given line end."""
+    text = json.dumps(records, indent=2).replace("\n", newline)
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        file.write(text)
+
+
+class TestIncrementalTotals(unittest.TestCase):
+    """Test class for compute_incremental_totals."""
+
+    def setUp(self):
+        """Set up a catalogue and a checkpoint in a temporary folder."""
+        self.folder = tempfile.TemporaryDirectory()
+        self.catalogue = os.path.join(self.folder.name, "Catalogue.json")
+        with open(self.catalogue, 'w', encoding='utf-8') as file:
+            json.dump(CATALOGUE, file)
+        self.checkpoint = os.path.join(self.folder.name, "Checkpoint.json")
+        self.sales = os.path.join(self.folder.name, "Sales.json")
+        self.cents_index = compute_sales.build_cents_index(CATALOGUE)
+
+    def tearDown(self):
+        """Remove the temporary folder."""
+        self.folder.cleanup()
+
+    def incremental_total(self):
+        """Run an incremental update and return its grand total."""
+        _, total = compute_sales.compute_incremental_totals(
+            compute_sales.build_price_index(CATALOGUE), self.catalogue,
+            [self.sales], ProductMatcher(), self.checkpoint)
+        return total
+
+    def full_total(self):
+        """Price the whole sales file again."""
+        return compute_sales.compute_total_cents(
+            self.cents_index, compute_sales.iter_sales(self.sales))
+
+    def check_appended_array(self, newline):
+        """Grow an array file and compare with a full recount."""
+        write_array(self.sales, [sale(i) for i in range(10)], newline)
+        self.assertEqual(self.incremental_total(), self.full_total())
+        write_array(self.sales, [sale(i) for i in range(22)], newline)
+        self.assertEqual(self.incremental_total(), self.full_total())
+
+    def test_append_to_array(self):
+        """Test records appended to an LF array are priced."""
+        self.check_appended_array("\n")
+
+    def test_append_to_crlf_array(self):
+        """Test the byte offsets of a CRLF array stay correct."""
+        self.check_appended_array("\r\n")
+
+    def test_record_being_written(self):
+        """Test a record cut at the end of the file is left for later."""
+        text = json.dumps([sale(1), sale(2)])
+        with open(self.sales, 'w', encoding='utf-8') as file:
+            file.write(text[:-20])
+        self.assertEqual(self.incremental_total(),
+                         compute_sales.compute_total_cents(
+                             self.cents_index, [sale(1)]))
+        with open(self.sales, 'w', encoding='utf-8') as file:
+            file.write(text)
+        self.assertEqual(self.incremental_total(), self.full_total())
+
+    def test_corrupt_record(self):
+        """Test a corrupt record in the middle of an array is reported."""
+        text = json.dumps([sale(1), sale(2), sale(3)])
+        with open(self.sales, 'w', encoding='utf-8') as file:
+            file.write(text.replace('"SALE_ID": 2', '"SALE_ID": 2 2'))
+        results, _ = compute_sales.compute_incremental_totals(
+            compute_sales.build_price_index(CATALOGUE), self.catalogue,
+            [self.sales], ProductMatcher(), self.checkpoint)
+        self.assertIsNone(results[0][1])
+        self.assertIn("Error loading", results[0][2])
+
+
+class TestJsonArray(unittest.TestCase):
+    """Test class for iter_json_array."""
+
+    def check(self, text):
+        """Compare the streamed elements with json.loads."""
+        for read_size in (1, 3, 16, compute_sales.READ_SIZE):
+            elements = compute_sales.iter_json_array(
+                io.StringIO(text), read_size)
+            self.assertEqual(list(elements), json.loads(text))
+
+    def test_records(self):
+        """Test records split across blocks at any position."""
+        self.check(json.dumps([sale(i) for i in range(40)], indent=2))
+        self.check('[{"a": "}, {"}, ["],[", 1], -1.5e3, null, "x,y"]')
+
+    def test_extra_data(self):
+        """Test only whitespace may follow the closing bracket."""
+        self.check("[1, 2] \n")
+        for text in ("[1,2]x", "[] 3", "[1,2]]"):
+            with self.assertRaises(json.JSONDecodeError):
+                list(compute_sales.iter_json_array(io.StringIO(text)))
+
+
+class TestExactCents(unittest.TestCase):
+    """Test class for the integer cents totals."""
+
+    def test_fractional_quantity(self):
+        """Test a fractional quantity is priced to the rounded cent."""
+        cents_index = compute_sales.build_cents_index(CATALOGUE)
+        sales = [{"Product": "Brown eggs", "Quantity": 1.5},
+                 {"Product": "Asparagus", "Quantity": 0.3},
+                 {"Product": "Asparagus", "Quantity": 2}]
+        total = compute_sales.compute_total_cents(cents_index, sales)
+        self.assertEqual(total, 4215 + 569 + 3790)
+        self.assertEqual(compute_sales.format_cents(total), "85.74")
+        aggregated, groups = compute_sales.aggregate_sales(
+            CATALOGUE, sales, ["product"], exact=True)
+        self.assertEqual(aggregated, total)
+        self.assertEqual(groups["product"]["Asparagus"], [4359, 2.3, 2])
+
+
+class TestCompiledCatalogue(unittest.TestCase):
+    """Test class for the compiled catalogue cache."""
+
+    def test_cache_round_trip(self):
+        """Test a cached catalogue keeps its order and price types."""
+        price_index = {"Zucchini": 3, "Apple": 1.5, "Mango": None}
+        with tempfile.TemporaryDirectory() as folder:
+            catalogue = os.path.join(folder, "Catalogue.json")
+            with open(catalogue, 'w', encoding='utf-8') as file:
+                json.dump([{"title": title, "price": price}
+                           for title, price in price_index.items()], file)
+            compute_sales.load_price_index(catalogue)
+            cached = compute_sales.load_price_index(catalogue)
+        self.assertIsInstance(cached, compute_sales.CompiledCatalogue)
+        self.assertEqual(list(cached.items()), list(price_index.items()))
+        self.assertIs(type(cached["Zucchini"]), int)
+
+
+if __name__ == "__main__":
+    unittest.main()
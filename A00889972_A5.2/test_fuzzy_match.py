@@ -0,0 +1,62 @@
+"""
+Unit tests for the fuzzy product matching.
+
+Author: Najk
+Date: 01-02-2024.
+"""
+
+import unittest
+
+from fuzzy_match import ProductMatcher, TrigramIndex, trigrams
+
+
+class TestTrigramIndex(unittest.TestCase):
+    """Test class for TrigramIndex."""
+
+    def test_trigrams_normalized(self):
+        """Test case and repeated whitespace are ignored."""
+        self.assertEqual(trigrams("Brown  Eggs"), trigrams("brown eggs"))
+
+    def test_exact_match(self):
+        """Test a catalogue title matches itself with similarity 1."""
+        index = TrigramIndex(["Brown eggs", "Asparagus"])
+        self.assertEqual(index.search("Asparagus"), ("Asparagus", 1.0))
+
+    def test_misspelling(self):
+        """Test a misspelled name finds its title."""
+        index = TrigramIndex(["Brown eggs", "Asparagus", "Green smoothie"])
+        title, score = index.search("Asparagos")
+        self.assertEqual(title, "Asparagus")
+        self.assertLess(score, 1)
+
+    def test_ties_keep_catalogue_order(self):
+        """Test equally similar titles resolve to the one listed first."""
+        titles = ["Apple pie", "apple  PIE", "Apple Pie"]
+        self.assertEqual(TrigramIndex(titles).search("apple pie")[0],
+                         "Apple pie")
+        self.assertEqual(TrigramIndex(titles[::-1]).search("apple pie")[0],
+                         "Apple Pie")
+
+    def test_threshold(self):
+        """Test no title is returned below the threshold."""
+        index = TrigramIndex(["Brown eggs"])
+        self.assertIsNone(index.search("Asparagus"))
+        self.assertIsNone(index.search("Brown rice", threshold=0.9))
+        self.assertIsNotNone(index.search("Brown rice", threshold=0.3))
+
+
+class TestProductMatcher(unittest.TestCase):
+    """Test class for ProductMatcher."""
+
+    def test_resolve_counts_lines(self):
+        """Test names are resolved once and their lines counted."""
+        matcher = ProductMatcher(TrigramIndex(["Asparagus"]))
+        for _ in range(3):
+            self.assertEqual(matcher.resolve("Asparagos"), "Asparagus")
+        self.assertIsNone(matcher.resolve("Quinoa"))
+        self.assertEqual(matcher.lines["Asparagos"], 3)
+        self.assertEqual(matcher.lines["Quinoa"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
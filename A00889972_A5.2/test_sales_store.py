@@ -0,0 +1,68 @@
+"""
+Unit tests for the columnar sales store.
+
+Author: Najk
+Date: 01-02-2024.
+"""
+
+import contextlib
+import io
+import tempfile
+import unittest
+
+import compute_sales
+import sales_store
+from fuzzy_match import ProductMatcher
+
+CATALOGUE = [{"title": "Brown eggs", "price": 28.1},
+             {"title": "Asparagus", "price": 18.95}]
+SALES = [
+    {"SALE_ID": 1, "SALE_Date": "01/12/23", "Product": "Brown eggs",
+     "Quantity": 2},
+    {"SALE_ID": "A-7", "SALE_Date": "2023-12-01", "Product": "Asparagus",
+     "Quantity": 3},
+    {"SALE_ID": None, "Product": "Asparagus", "Quantity": 1},
+    {"SALE_ID": 2, "SALE_Date": "01/12/23", "Product": "Asparagus",
+     "Quantity": 1.5},
+    {"SALE_ID": 2, "SALE_Date": "01/12/23", "Product": "Brown eggs",
+     "Quantity": "4"},
+]
+
+
+class TestSalesStore(unittest.TestCase):
+    """Test class for SalesStore."""
+
+    def setUp(self):
+        """Convert the sales into a temporary store."""
+        self.folder = tempfile.TemporaryDirectory()
+        self.output = io.StringIO()
+        with contextlib.redirect_stdout(self.output):
+            self.store = sales_store.SalesStore.convert(
+                SALES, self.folder.name)
+
+    def tearDown(self):
+        """Remove the temporary store."""
+        del self.store
+        self.folder.cleanup()
+
+    def test_bad_rows_reported(self):
+        """Test rows with a non-integer quantity are left out."""
+        self.assertEqual(self.store.rows, 3)
+        self.assertIn("record 4", self.output.getvalue())
+        self.assertIn("record 5", self.output.getvalue())
+
+    def test_groups_match_aggregate(self):
+        """Test sale IDs and dates are kept as written when grouping."""
+        price_index = compute_sales.build_price_index(CATALOGUE)
+        for exact in (False, True):
+            total, groups = compute_sales.aggregate_sales(
+                CATALOGUE, SALES[:3], ["sale", "date"], exact=exact)
+            self.assertEqual(self.store.total_cost(
+                price_index, exact, ProductMatcher()), total)
+            for grouping, table in groups.items():
+                self.assertEqual(self.store.group_totals(
+                    grouping, price_index, exact), table)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,224 @@
+"""
+
+Generates deterministic synthetic inputs for the benchmark suite.
+
+The generated files follow the shape of the course test cases:
+number files like A4.2/P1 and A4.2/P2, word files like A4.2/P3, and
+catalogue and sales JSON pairs like A5.2/TC1-TC3. Every file is
+written as a stream, so sizes up to 10^8 records fit in constant
+memory, and the same seed always produces the same bytes.
+
+Usage: python generate_data.py kind count outputPath [--seed N]
+
+Kinds: numbers, integers, words, sales (outputPath is a directory).
+
+Author: Najk
+Date: 01-02-2024.
+"""
+
+import argparse
+import json
+import os
+import random
+
+WORDS = (
+    "mother", "tions", "pin", "sure", "regulatory", "conduct", "kuwait",
+    "literacy", "table", "parent", "neighbors", "manual", "political",
+    "mozambique", "old", "disciplinary", "continues", "literally",
+    "ringtone", "parameter", "loaded", "wilderness", "specify", "cole",
+    "telecom", "breakfast", "salad", "garden", "window", "river",
+)
+PRODUCT_TYPES = ("dairy", "fruit", "vegetable", "bakery", "meat")
+INVALID_TOKENS = ("ABA", "23,45", "11;54", "ll", "ERROR")
+LINES_PER_WRITE = 10000
+
+
+def _write_lines(path, lines):
+    """Write an iterable of lines to a file in large batches."""
+    with open(path, 'w', encoding='utf-8') as file:
+        batch = []
+        for line in lines:
+            batch.append(line)
+            if len(batch) == LINES_PER_WRITE:
+                file.write("\n".join(batch) + "\n")
+                batch = []
+        if batch:
+            file.write("\n".join(batch) + "\n")
+
+
+def generate_numbers(path, count, seed=0):
+    """
+    Write a P1-style file of numbers with a few invalid lines.
+
+    Args:
+        path (str): The file to write.
+        count (int): Number of lines.
+        seed (int): Seed of the random generator.
+    """
+    rng = random.Random(seed)
+
+    def lines():
+        for _ in range(count):
+            roll = rng.random()
+            if roll < 0.001:
+                yield rng.choice(INVALID_TOKENS)
+            elif roll < 0.3:
+                yield str(rng.randint(0, 2000) / 4)
+            else:
+                yield str(rng.randint(0, 500))
+
+    _write_lines(path, lines())
+
+
+def generate_integers(path, count, seed=0):
+    """
+    Write a P2-style file of positive and negative integers.
+
+    Args:
+        path (str): The file to write.
+        count (int): Number of lines.
+        seed (int): Seed of the random generator.
+    """
+    rng = random.Random(seed)
+    _write_lines(path, (str(rng.randint(-10000000, 10000000))
+                        for _ in range(count)))
+
+
+def generate_words(path, count, seed=0):
+    """
+    Write a P3-style file with one word per line.
+
+    Words are drawn with a skewed distribution, and about one in ten
+    is made unique so the vocabulary grows with the file.
+
+    Args:
+        path (str): The file to write.
+        count (int): Number of words.
+        seed (int): Seed of the random generator.
+    """
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(WORDS))]
+
+    def lines():
+        for index in range(count):
+            word = rng.choices(WORDS, weights)[0]
+            if rng.random() < 0.1:
+                word = f"{word}{index}"
+            yield word
+
+    _write_lines(path, lines())
+
+
+def _product_title(index):
+    """Return the catalogue title of a product."""
+    return f"{WORDS[index % len(WORDS)].capitalize()} product {index}"
+
+
+def generate_catalogue(path, products, seed=0):
+    """
+    Write a ProductList-style catalogue.
+
+    Args:
+        path (str): The file to write.
+        products (int): Number of products.
+        seed (int): Seed of the random generator.
+    """
+    rng = random.Random(seed)
+    catalogue = [{
+        "title": _product_title(index),
+        "type": rng.choice(PRODUCT_TYPES),
+        "description": f"Description of product {index}",
+        "filename": f"{index}.jpg",
+        "height": 600,
+        "width": 400,
+        "price": rng.randint(100, 5000) / 100,
+        "rating": rng.randint(1, 5),
+    } for index in range(products)]
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(catalogue, file, indent=2)
+
+
+def generate_sales(path, count, products, seed=0):
+    """
+    Write a Sales-style JSON array, about 5% of it with unknown products.
+
+    Args:
+        path (str): The file to write.
+        count (int): Number of sale records.
+        products (int): Number of products in the catalogue.
+        seed (int): Seed of the random generator.
+    """
+    rng = random.Random(seed)
+
+    def lines():
+        yield "["
+        sale_id = 1
+        for index in range(count):
+            if rng.random() < 0.3:
+                sale_id += 1
+            product = rng.randrange(products)
+            title = _product_title(product)
+            if rng.random() < 0.05:
+                title = title.lower()
+            record = {
+                "SALE_ID": sale_id,
+                "SALE_Date": f"{rng.randint(1, 28):02d}/12/23",
+                "Product": title,
+                "Quantity": rng.randint(1, 10),
+            }
+            separator = "," if index < count - 1 else ""
+            yield "  " + json.dumps(record) + separator
+        yield "]"
+
+    _write_lines(path, lines())
+
+
+def generate_sales_pair(directory, count, products=200, seed=0):
+    """
+    Write a catalogue and a sales file into a directory.
+
+    Args:
+        directory (str): The directory to write to.
+        count (int): Number of sale records.
+        products (int): Number of products in the catalogue.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        tuple: The catalogue path and the sales path.
+    """
+    os.makedirs(directory, exist_ok=True)
+    catalogue_path = os.path.join(directory, "ProductList.json")
+    sales_path = os.path.join(directory, "Sales.json")
+    generate_catalogue(catalogue_path, products, seed)
+    generate_sales(sales_path, count, products, seed)
+    return catalogue_path, sales_path
+
+
+GENERATORS = {
+    "numbers": generate_numbers,
+    "integers": generate_integers,
+    "words": generate_words,
+}
+
+
+def main():
+    """
+    Main function to execute the script.
+    """
+    parser = argparse.ArgumentParser(
+        usage="python generate_data.py kind count outputPath")
+    parser.add_argument("kind", choices=sorted(GENERATORS) + ["sales"])
+    parser.add_argument("count", type=float, help="number of records")
+    parser.add_argument("output", help="output file, or directory for sales")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    count = int(args.count)
+    if args.kind == "sales":
+        generate_sales_pair(args.output, count, seed=args.seed)
+    else:
+        GENERATORS[args.kind](args.output, count, args.seed)
+
+
+if __name__ == "__main__":
+    main()
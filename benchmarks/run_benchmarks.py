@@ -0,0 +1,304 @@
+"""
+
+Benchmarks the A4.2 and A5.2 scripts on synthetic inputs.
+
+Each script is split into the phases of its process_file or main
+function, and every phase is timed with time.perf_counter and measured
+for peak traced memory with tracemalloc in a separate pass. Inputs are
+created with generate_data for each requested size and cached in the
+data directory. Results can be saved as a JSON baseline and compared
+against a previous one to spot regressions.
+
+Usage: python run_benchmarks.py [--sizes 1e3,1e4,1e5] [--save out.json]
+                                [--compare baseline.json]
+
+Author: Najk
+Date: 01-02-2024.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from decimal import Decimal
+
+import generate_data
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "A00889972_A4.2"))
+sys.path.insert(0, os.path.join(ROOT, "A00889972_A5.2"))
+
+# pylint: disable=wrong-import-position
+import compute_sales  # noqa: E402
+import compute_statistics  # noqa: E402
+import convert_numbers  # noqa: E402
+import sales_store  # noqa: E402
+import word_count  # noqa: E402
+
+DEFAULT_SIZES = "1e3,1e4,1e5"
+
+
+def statistics_phases(path):
+    """Return the phases of compute_statistics for a number file."""
+    cs = compute_statistics
+    return [
+        ("read", lambda state: cs.read_file(path)),
+        ("mean", lambda state: cs.compute_mean(state["read"])),
+        ("median", lambda state: cs.compute_median(state["read"])),
+        ("mode", lambda state: cs.compute_mode(state["read"])),
+        ("variance", lambda state: cs.compute_variance(
+            state["read"], state["mean"])),
+        ("standard_deviation", lambda state: cs.compute_standard_deviation(
+            state["read"], state["mean"])),
+        ("streaming", lambda state: cs.StreamingStatistics(
+            True, True).consume(cs.iter_numbers(path))),
+    ]
+
+
+def conversion_phases(path):
+    """Return the phases of convert_numbers for an integer file."""
+    cn = convert_numbers
+    return [
+        ("read", lambda state: cn.read_file(path)),
+        ("binary", lambda state: [
+            cn.convert_to_binary(number) for number in state["read"]]),
+        ("hexadecimal", lambda state: [
+            cn.convert_to_hexadecimal(number) for number in state["read"]]),
+        ("batch", lambda state: cn.BatchConverter().convert(state["read"])),
+    ]
+
+
+def word_count_phases(path):
+    """Return the phases of word_count for a word file."""
+    return [
+        ("read", lambda state: word_count.read_file(path)),
+        ("count", lambda state: word_count.count_words(state["read"])),
+        ("streaming", lambda state: word_count.count_file_words(path)),
+    ]
+
+
+def decimal_total(price_index, sales_record):
+    """
+    Compute the total cost of sales with decimal.Decimal.
+
+    Reference for the float and integer-cents totals of compute_sales.
+    """
+    decimal_index = {title: Decimal(repr(price))
+                     for title, price in price_index.items()}
+    total_cost = Decimal(0)
+    for sale in sales_record:
+        item_price = decimal_index.get(sale.get('Product'))
+        if item_price is not None:
+            total_cost += sale.get('Quantity', 0) * item_price
+    return total_cost
+
+
+def sales_phases(paths):
+    """Return the phases of compute_sales for a catalogue and sales pair."""
+    catalogue_path, sales_path = paths
+    return [
+        ("load_catalogue",
+         lambda state: compute_sales.load_json_file(catalogue_path)),
+        ("load_sales",
+         lambda state: compute_sales.load_json_file(sales_path)),
+        ("index", lambda state: compute_sales.build_price_index(
+            state["load_catalogue"])),
+        ("total", lambda state: compute_sales.compute_total_cost(
+            state["index"], state["load_sales"])),
+        ("stream_total", lambda state: compute_sales.compute_total_cost(
+            state["index"], compute_sales.iter_sales(sales_path))),
+        ("total_decimal", lambda state: decimal_total(
+            state["index"], state["load_sales"])),
+        ("cents_index", lambda state: compute_sales.build_cents_index(
+            state["load_catalogue"])),
+        ("total_cents", lambda state: compute_sales.compute_total_cents(
+            state["cents_index"], state["load_sales"])),
+        ("aggregate", lambda state: compute_sales.aggregate_sales(
+            state["load_catalogue"], state["load_sales"])),
+        ("store_convert", lambda state: sales_store.SalesStore.convert(
+            state["load_sales"], "sales_store")),
+        ("store_total", lambda state: state["store_convert"].total_cost(
+            state["index"])),
+    ]
+
+
+BENCHMARKS = {
+    "compute_statistics": (
+        "numbers.txt", generate_data.generate_numbers, statistics_phases),
+    "convert_numbers": (
+        "integers.txt", generate_data.generate_integers, conversion_phases),
+    "word_count": (
+        "words.txt", generate_data.generate_words, word_count_phases),
+    "compute_sales": (
+        "sales", generate_data.generate_sales_pair, sales_phases),
+}
+
+
+def prepare_input(data_dir, name, size, seed):
+    """
+    Generate the input of a benchmark unless it is already cached.
+
+    Returns:
+        str or tuple: The input path, or the catalogue and sales paths.
+    """
+    file_name, generator, _ = BENCHMARKS[name]
+    path = os.path.join(data_dir, f"{size}-{seed}-{file_name}")
+    if name == "compute_sales":
+        marker = os.path.join(path, "Sales.json")
+        if not os.path.exists(marker):
+            generator(path, size, seed=seed)
+        return (os.path.join(path, "ProductList.json"), marker)
+    if not os.path.exists(path):
+        generator(path, size, seed)
+    return path
+
+
+def time_phases(phases):
+    """
+    Run the phases in order and time each one.
+
+    Returns:
+        dict: Seconds taken by each phase.
+    """
+    state = {}
+    seconds = {}
+    for name, phase in phases:
+        start = time.perf_counter()
+        state[name] = phase(state)
+        seconds[name] = time.perf_counter() - start
+    return seconds
+
+
+def measure_phases(phases):
+    """
+    Run the phases in order and record the peak memory of each one.
+
+    Returns:
+        dict: Peak traced bytes allocated during each phase.
+    """
+    state = {}
+    peaks = {}
+    tracemalloc.start()
+    try:
+        for name, phase in phases:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            state[name] = phase(state)
+            peaks[name] = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def run_benchmark(name, source, repeat):
+    """
+    Benchmark one script on one input.
+
+    The best time of ``repeat`` runs is kept; memory is measured in a
+    separate run because tracing slows the phases down.
+
+    Returns:
+        dict: Seconds and peak bytes of each phase.
+    """
+    phases_for = BENCHMARKS[name][2]
+    with open(os.devnull, 'w', encoding='utf-8') as devnull:
+        with contextlib.redirect_stdout(devnull):
+            runs = [time_phases(phases_for(source)) for _ in range(repeat)]
+            peaks = measure_phases(phases_for(source))
+    return {phase: {"seconds": min(run[phase] for run in runs),
+                    "peak_bytes": peaks[phase]}
+            for phase in runs[0]}
+
+
+def compare(results, baseline, threshold):
+    """
+    Print how each phase changed against a baseline.
+
+    Args:
+        results (dict): The current results.
+        baseline (dict): The baseline results.
+        threshold (float): Relative slowdown reported as a regression.
+
+    Returns:
+        int: Number of regressions found.
+    """
+    regressions = 0
+    print("Comparison with baseline:")
+    for name, sizes in results.items():
+        for size, phases in sizes.items():
+            for phase, current in phases.items():
+                previous = baseline.get(name, {}).get(size, {}).get(phase)
+                if not previous or not previous["seconds"]:
+                    continue
+                ratio = current["seconds"] / previous["seconds"]
+                flag = ""
+                if ratio > 1 + threshold:
+                    flag = "\tREGRESSION"
+                    regressions += 1
+                print(f"{name}\t{size}\t{phase}\t{ratio:.2f}x{flag}")
+    return regressions
+
+
+def main():
+    """
+    Main function to execute the script.
+    """
+    parser = argparse.ArgumentParser(
+        usage="python run_benchmarks.py [--sizes 1e3,1e4,1e5]")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help="comma-separated record counts, up to 1e8")
+    parser.add_argument("--only", default=",".join(BENCHMARKS),
+                        help="comma-separated scripts to benchmark")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", default=None,
+                        help="where generated inputs are cached")
+    parser.add_argument("--save", help="write the results as JSON")
+    parser.add_argument("--compare", help="baseline JSON to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown reported as regression")
+    args = parser.parse_args()
+
+    sizes = [int(float(size)) for size in args.sizes.split(",")]
+    names = args.only.split(",")
+    data_dir = os.path.abspath(args.data_dir or os.path.join(
+        tempfile.gettempdir(), "pruebas-benchmarks"))
+    os.makedirs(data_dir, exist_ok=True)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        current_dir = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            for name in names:
+                for size in sizes:
+                    source = prepare_input(data_dir, name, size, args.seed)
+                    phases = run_benchmark(name, source, args.repeat)
+                    results.setdefault(name, {})[str(size)] = phases
+                    for phase, value in phases.items():
+                        print(f"{name}\t{size}\t{phase}"
+                              f"\t{value['seconds']:.6f} s"
+                              f"\t{value['peak_bytes']} B")
+        finally:
+            os.chdir(current_dir)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as result_file:
+            json.dump({"python": platform.python_version(),
+                       "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "results": results}, result_file, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()